@@ -10,15 +10,89 @@ Parses DWARF debug information from object files to extract:
 
 This is used as a fallback when Ghidra's DWARF analyzer fails to import
 variable names (common with ARMCC-generated DWARF).
+
+DWARF is read by parsing the output of `llvm-dwarfdump --debug-info` or,
+failing that, `readelf --debug-dump=info`. When neither tool is installed,
+it is read in-process with pyelftools, if available.
 """
 
+import functools
+import hashlib
+import itertools
+import mmap
+import os
+import pickle
 import re
+import shutil
 import subprocess
+import sys
+import tempfile
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
-
-
-@dataclass
+from typing import Callable, Collection, Dict, List, Optional, Set, Tuple, Union
+
+# In-process DWARF reader (optional, used when no dump tool is installed)
+try:
+    from elftools.dwarf.descriptions import describe_reg_name
+    from elftools.elf.elffile import ELFFile
+
+    HAS_PYELFTOOLS = True
+except ImportError:
+    HAS_PYELFTOOLS = False
+
+# Scanner for readelf --debug-dump=info output. It is run with finditer()
+# over the whole dump, so lines that are neither a DIE header
+# (" <depth><offset>: Abbrev Number: N (DW_TAG_...)"), an attribute
+# ("    <offset>   DW_AT_...   : value") nor a unit "Version:" line are
+# skipped inside the regex engine rather than in Python. Indirect string
+# prefixes such as "(indirect string, offset: 0x22): " are dropped from the
+# value. readelf output may be localized, e.g. full-width colons and "版本".
+_READELF_LINE_RE = re.compile(
+    rb"^[ \t]*(?:<(?P<depth>\d+)><(?P<offset>[0-9a-fA-F]+)>(?:.*\((?P<tag>DW_TAG_\w+)\))?"
+    rb"|(?:<[0-9a-fA-F]+>)?[ \t]*(?P<attr>DW_AT_\w+)[ \t]*(?::|\xef\xbc\x9a)[ \t]*"
+    rb"(?:\(indirect[^)\n]*\)(?::|\xef\xbc\x9a)[ \t]*)?(?P<value>.*)"
+    rb"|(?:Version|\xe7\x89\x88\xe6\x9c\xac)[^\d\n]*(?P<version>\d+))",
+    re.MULTILINE,
+)
+
+# Scanner for llvm-dwarfdump --debug-info --show-form output: DIE headers
+# ("0x0000002d:   DW_TAG_variable", indented two spaces per level),
+# attributes ("    DW_AT_name [DW_FORM_string]\t(\"g\")") and unit headers
+# carrying the version. --show-form keeps DW_AT_high_pc as the raw value.
+_DWARFDUMP_LINE_RE = re.compile(
+    rb"^(?:0x(?P<offset>[0-9a-fA-F]+):(?P<indent> +)(?P<tag>DW_TAG_\w+)"
+    rb"|[ \t]+(?P<attr>DW_AT_\w+)(?: \[DW_FORM_\w+\])?\t\((?P<value>.*)\)$"
+    rb"|0x[0-9a-fA-F]+: \w+ Unit:.*?version = (?P<version>0x[0-9a-fA-F]+))",
+    re.MULTILINE,
+)
+_DWARFDUMP_REG_RE = re.compile(rb"(DW_OP_reg\d+) (\w+)")
+
+# DWARF dump tools, probed once; llvm-dwarfdump is preferred over readelf
+_LLVM_DWARFDUMP = shutil.which("llvm-dwarfdump")
+_READELF = shutil.which("readelf")
+
+# Attribute value fields in readelf output
+_TYPE_REF_RE = re.compile(rb"<(?:0x)?([0-9a-fA-F]+)>")
+_HEX_RE = re.compile(rb"0x([0-9a-fA-F]+)")
+_WORD_RE = re.compile(rb"\w+")
+_LOC_REG_RE = re.compile(rb"DW_OP_reg\d+\s*\((\w+)\)")
+
+# Identifier at the start of a DWARF name attribute
+_IDENT_RE = re.compile(r"\w+")
+
+# Function definition in decompiled code: "<type> <name>("
+_FUNC_SIG_RE = re.compile(r"^(\w+)\s+(\w+)\s*\(")
+# Same, for collecting the names of all definitions in one scan
+_FUNC_NAME_RE = re.compile(r"^\s*\w+\s+(\w+)\s*\(", re.MULTILINE)
+
+# Ghidra auto-generated parameter name, captures the 1-based index
+_PARAM_RE = re.compile(r"\bparam_(\d+)\b")
+
+
+# Slotted dataclasses (no per-instance __dict__) where supported (3.10+)
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class DwarfVariable:
     """Represents a variable from DWARF debug info"""
 
@@ -28,7 +102,7 @@ class DwarfVariable:
     location: str = ""  # Register or stack location
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class DwarfFunction:
     """Represents a function from DWARF debug info"""
 
@@ -42,7 +116,7 @@ class DwarfFunction:
     source_line: int = 0
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class DwarfInfo:
     """Complete DWARF information for an object file"""
 
@@ -53,254 +127,653 @@ class DwarfInfo:
     has_local_vars: bool = False
 
 
-def parse_dwarf_info(obj_file: str) -> DwarfInfo:
+# Parsed DWARF info by (path, mtime, size, function filter, backend), so
+# unchanged object files are only parsed once per process. Cleared when it
+# reaches the size limit, like the other in-process caches
+_dwarf_info_cache: Dict[tuple, DwarfInfo] = {}
+_DWARF_INFO_CACHE_MAX = 50000
+
+# Persistent cache of pickled DwarfInfo across runs. It is unbounded and
+# unpickles what it finds, so it is only used with LIBSURGEON_CACHE=1.
+# Bump the version when the pickled dataclasses or parsing change.
+DWARF_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "libsurgeon",
+    "dwarf",
+)
+_DWARF_CACHE_VERSION = 2
+
+
+def parse_dwarf_info(
+    obj_file: str,
+    function_names: Optional[Collection[str]] = None,
+    backend: str = "auto",
+    cache: bool = True,
+) -> DwarfInfo:
     """
     Parse DWARF debug information from an object file.
 
     Args:
         obj_file: Path to the object file
+        function_names: Only parse these functions (None for all); the
+            parameters and locals of other functions are never read
+        backend: "pyelftools", "llvm-dwarfdump" or "readelf", or "auto"
+            to use the fastest one available
+        cache: Keep the result in the in-process cache; callers that use
+            each object's info once can pass False so it is not retained
 
     Returns:
         DwarfInfo object with parsed debug information
     """
+    try:
+        st = os.stat(obj_file)
+    except OSError:
+        return DwarfInfo()
+
+    key = (
+        os.path.abspath(obj_file),
+        st.st_mtime_ns,
+        st.st_size,
+        None if function_names is None else tuple(sorted(set(function_names))),
+        backend,
+    )
+    info = _dwarf_info_cache.get(key)
+    if info is not None:
+        return info
+
+    cache_file = None
+    if os.environ.get("LIBSURGEON_CACHE") == "1":
+        digest = hashlib.sha1(repr((_DWARF_CACHE_VERSION, key)).encode("utf-8"))
+        cache_file = os.path.join(DWARF_CACHE_DIR, digest.hexdigest() + ".pkl")
+        info = _load_cached_dwarf_info(cache_file)
+
+    if info is None:
+        info = _read_dwarf_info(obj_file, function_names, backend)
+        if cache_file:
+            _store_cached_dwarf_info(cache_file, info)
+
+    if cache:
+        if len(_dwarf_info_cache) >= _DWARF_INFO_CACHE_MAX:
+            _dwarf_info_cache.clear()
+        _dwarf_info_cache[key] = info
+    return info
+
+
+def _load_cached_dwarf_info(cache_file: str) -> Optional[DwarfInfo]:
+    """Load a pickled DwarfInfo, or None if it is missing or unreadable"""
+    try:
+        with open(cache_file, "rb") as f:
+            info = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, TypeError):
+        return None
+    return info if isinstance(info, DwarfInfo) else None
+
+
+def _store_cached_dwarf_info(cache_file: str, info: DwarfInfo):
+    """Pickle a DwarfInfo atomically; failures only cost a re-parse later"""
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(cache_file), suffix=".tmp", delete=False
+        ) as f:
+            pickle.dump(info, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(f.name, cache_file)
+    except OSError:
+        pass
+
+
+def _read_dwarf_info(
+    obj_file: str, function_names: Optional[Collection[str]], backend: str
+) -> DwarfInfo:
+    """Parse DWARF info with the requested backend, without caching"""
+    # The dump tools parse DWARF natively and are several times faster than
+    # walking the DIE tree in Python, so pyelftools is only the last resort
+    if backend == "auto":
+        if _LLVM_DWARFDUMP:
+            backend = "llvm-dwarfdump"
+        elif _READELF:
+            backend = "readelf"
+        else:
+            backend = "pyelftools"
+
+    if backend == "pyelftools":
+        if not HAS_PYELFTOOLS:
+            return DwarfInfo()
+        try:
+            return _parse_with_pyelftools(obj_file, function_names)
+        except Exception as e:
+            # Corrupt or truncated objects make pyelftools raise all sorts
+            # of errors (OverflowError, AssertionError, KeyError, ...)
+            _warn_unparsed(obj_file, e)
+            return DwarfInfo()
+
+    if backend == "llvm-dwarfdump":
+        cmd = [_LLVM_DWARFDUMP, "--debug-info", "--show-form", obj_file]
+        parse_output = _parse_dwarfdump_output
+    else:
+        cmd = [_READELF, "--debug-dump=info", obj_file]
+        parse_output = _parse_dwarf_output
+
     info = DwarfInfo()
 
+    # No dump tool installed; don't fork just to fail
+    if cmd[0] is None:
+        return info
+
     try:
-        # Run readelf to get debug info
-        result = subprocess.run(
-            ["readelf", "--debug-dump=info", obj_file],
-            capture_output=True,
-            text=True,
-            timeout=60,
-        )
+        # The dump goes to a temporary file that is scanned through mmap, so
+        # the (possibly very large) output is never copied into memory. The
+        # mapping stays valid after the file is closed.
+        with tempfile.TemporaryFile() as dump_file:
+            result = subprocess.run(
+                cmd, stdout=dump_file, stderr=subprocess.DEVNULL, timeout=60
+            )
+
+            if result.returncode != 0 or os.fstat(dump_file.fileno()).st_size == 0:
+                return info
+
+            dump = mmap.mmap(dump_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, subprocess.TimeoutExpired, ValueError):
+        return info  # Dump tool could not be run or its output mapped
+
+    with dump:
+        try:
+            return parse_output(dump, function_names)
+        except Exception as e:
+            _warn_unparsed(obj_file, e)
+            return info
+
+
+def _warn_unparsed(obj_file: str, error: Exception):
+    """Report DWARF info that is dropped because it could not be parsed"""
+    print(
+        f"[WARN] Could not parse DWARF info from {obj_file}: {error!r}",
+        file=sys.stderr,
+    )
+
+
+def _attr_str(die, name: str) -> str:
+    """Return a string attribute of a DIE, or "" if it is absent"""
+    attr = die.attributes.get(name)
+    if attr is None:
+        return ""
+    value = attr.value
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return str(value)
+
 
-        if result.returncode != 0:
+def _attr_int(die, name: str) -> int:
+    """Return an integer attribute of a DIE, or 0 if it is absent"""
+    attr = die.attributes.get(name)
+    if attr is None or not isinstance(attr.value, int):
+        return 0
+    return attr.value
+
+
+def _parse_with_pyelftools(
+    obj_file: str, function_names: Optional[Collection[str]] = None
+) -> DwarfInfo:
+    """Parse DWARF debug info by walking the DIE tree with pyelftools"""
+    info = DwarfInfo()
+
+    with open(obj_file, "rb") as f:
+        elf = ELFFile(f)
+        if not elf.has_dwarf_info():
             return info
 
-        output = result.stdout
-        info = _parse_dwarf_output(output)
+        arch = elf.get_machine_arch()
+        dwarf = elf.get_dwarf_info()
 
-    except subprocess.TimeoutExpired:
-        pass
-    except FileNotFoundError:
-        pass
-    except Exception:
-        pass
+        for cu in dwarf.iter_CUs():
+            info.dwarf_version = cu.header.version
+            top_die = cu.get_top_DIE()
+
+            producer = _attr_str(top_die, "DW_AT_producer")
+            if producer:
+                info.compiler = producer.strip()
+            name = _attr_str(top_die, "DW_AT_name")
+            if name.endswith(".cpp") or name.endswith(".c"):
+                info.source_file = name
+
+            # Type names resolved so far (absolute DIE offset -> type name)
+            type_map: Dict[int, str] = {}
+
+            _collect_functions(top_die, info, function_names, type_map, arch)
 
     return info
 
 
-def _parse_dwarf_output(output: str) -> DwarfInfo:
-    """Parse the output of readelf --debug-dump=info"""
-    info = DwarfInfo()
+# DIEs whose children may declare or define functions (C++ namespaces and
+# class methods), besides the compilation unit itself
+_SCOPE_TAGS = frozenset(
+    (
+        "DW_TAG_namespace",
+        "DW_TAG_class_type",
+        "DW_TAG_structure_type",
+        "DW_TAG_union_type",
+    )
+)
+
+
+def _collect_functions(
+    scope, info: DwarfInfo, function_names, type_map: Dict[int, str], arch: str
+):
+    """Add the subprograms of a scope DIE, including nested scopes, to info"""
+    for die in scope.iter_children():
+        if die.tag == "DW_TAG_subprogram":
+            if (
+                function_names is not None
+                and _attr_str(die, "DW_AT_name").strip() not in function_names
+            ):
+                continue
+            func = _read_function_die(die, type_map, arch)
+            if func.name:
+                info.functions[func.name] = func
+                if func.parameters or func.local_variables:
+                    info.has_local_vars = True
+        elif die.tag in _SCOPE_TAGS and die.has_children:
+            _collect_functions(die, info, function_names, type_map, arch)
+
+
+# Type DIEs named after their DW_AT_name, and qualifiers that are looked
+# through to the type they qualify; all backends resolve types this way
+_NAMED_TYPE_TAGS = frozenset(
+    (
+        "DW_TAG_base_type",
+        "DW_TAG_typedef",
+        "DW_TAG_structure_type",
+        "DW_TAG_union_type",
+        "DW_TAG_class_type",
+        "DW_TAG_enumeration_type",
+    )
+)
+_QUALIFIER_TYPE_TAGS = frozenset(
+    ("DW_TAG_const_type", "DW_TAG_volatile_type", "DW_TAG_restrict_type")
+)
+
+
+def _resolve_type_name(die, type_map: Dict[int, str]) -> str:
+    """Resolve the DW_AT_type of a DIE to a base or pointer type name"""
+    if "DW_AT_type" not in die.attributes:
+        return "unknown"
+
+    type_die = die.get_DIE_from_attribute("DW_AT_type")
+    if type_die.offset in type_map:
+        return type_map[type_die.offset]
+
+    if type_die.tag in _NAMED_TYPE_TAGS:
+        type_name = _attr_str(type_die, "DW_AT_name") or "unknown"
+    elif type_die.tag in _QUALIFIER_TYPE_TAGS:
+        type_name = _resolve_type_name(type_die, type_map)
+    elif type_die.tag == "DW_TAG_pointer_type":
+        base_type = _resolve_type_name(type_die, type_map)
+        type_name = ("void" if base_type == "unknown" else base_type) + "*"
+    else:
+        type_name = "unknown"
+
+    # Type names repeat across many variables; share one string for each
+    type_name = sys.intern(type_name)
+    type_map[type_die.offset] = type_name
+    return type_name
+
+
+def _read_location_register(die, arch: str) -> str:
+    """Return the register name when a DIE lives in a single register"""
+    attr = die.attributes.get("DW_AT_location")
+    if attr is None or not isinstance(attr.value, list) or not attr.value:
+        return ""
 
-    lines = output.split("\n")
+    # DW_OP_reg0 .. DW_OP_reg31
+    opcode = attr.value[0]
+    if 0x50 <= opcode <= 0x6F:
+        return sys.intern(describe_reg_name(opcode - 0x50, arch))
+    return ""
 
-    # State machine for parsing
-    current_function: Optional[DwarfFunction] = None
-    in_function = False
-    func_depth = 0
 
-    # Type reference map (offset -> type name)
-    type_map: Dict[str, str] = {}
-
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-
-        # Detect depth level - format: " <depth><offset>..."
-        # Examples: " <0><b>：", " <1><e5>：", " <2><181>："
-        depth_match = re.match(r"\s*<(\d+)><([0-9a-fA-F]+)>", line)
-        current_depth = -1
-        current_offset = ""
-        if depth_match:
-            current_depth = int(depth_match.group(1))
-            current_offset = depth_match.group(2)
-
-        # Parse compilation unit info
-        if "DW_AT_producer" in line:
-            match = re.search(r"DW_AT_producer\s*[:：]\s*(.+)$", line)
-            if match:
-                info.compiler = match.group(1).strip()
-
-        # Parse source file name
-        if "DW_AT_name" in line and not in_function:
-            match = re.search(r"DW_AT_name\s*[:：]\s*(.+)$", line)
-            if match:
-                name = match.group(1).strip()
-                if name.endswith(".cpp") or name.endswith(".c"):
-                    info.source_file = name
-
-        # Parse version from header
-        if ("版本" in line or "Version" in line) and "DW_" not in line:
-            match = re.search(r"(\d+)", line)
-            if match:
-                info.dwarf_version = int(match.group(1))
-
-        # Parse base types for type map
-        if "DW_TAG_base_type" in line and current_offset:
-            # Look for name in next few lines
-            for j in range(i + 1, min(i + 6, len(lines))):
-                if "DW_AT_name" in lines[j] and "<" not in lines[j][:10]:
-                    name_match = re.search(r"DW_AT_name\s*[:：]\s*(.+)$", lines[j])
-                    if name_match:
-                        type_map[current_offset] = name_match.group(1).strip()
-                    break
-                if re.match(r"\s*<\d+><", lines[j]):
-                    break
-
-        # Parse pointer types
-        if "DW_TAG_pointer_type" in line and current_offset:
-            for j in range(i + 1, min(i + 4, len(lines))):
-                if "DW_AT_type" in lines[j]:
-                    ref_match = re.search(r"<0x([0-9a-fA-F]+)>", lines[j])
-                    if not ref_match:
-                        ref_match = re.search(r"<([0-9a-fA-F]+)>", lines[j])
-                    if ref_match:
-                        ref_offset = ref_match.group(1)
-                        base_type = type_map.get(ref_offset, "void")
-                        type_map[current_offset] = base_type + "*"
-                    break
-                if re.match(r"\s*<\d+><", lines[j]):
-                    break
-
-        # Parse subprogram (function)
-        if "DW_TAG_subprogram" in line:
-            # Save previous function if exists
-            if current_function and current_function.name:
-                info.functions[current_function.name] = current_function
+def _read_variable_die(die, type_map: Dict[int, str], arch: str, is_parameter: bool):
+    """Build a DwarfVariable from a formal_parameter or variable DIE"""
+    match = _IDENT_RE.match(_attr_str(die, "DW_AT_name"))
+    var = DwarfVariable(name=match.group(0) if match else "", is_parameter=is_parameter)
+    var.type_name = _resolve_type_name(die, type_map)
+    var.location = _read_location_register(die, arch)
+    return var
 
-            current_function = DwarfFunction(name="")
-            in_function = True
-            func_depth = current_depth
-
-            # Parse function attributes in following lines
-            j = i + 1
-            while j < len(lines):
-                attr_line = lines[j]
-                # Stop at next DIE entry
-                if re.match(r"\s*<\d+><[0-9a-fA-F]+>", attr_line):
-                    break
-
-                if "DW_AT_name" in attr_line:
-                    match = re.search(r"DW_AT_name\s*[:：]\s*(\S+)", attr_line)
-                    if match:
-                        current_function.name = match.group(1).strip()
-
-                elif "DW_AT_low_pc" in attr_line:
-                    match = re.search(r"0x([0-9a-fA-F]+)", attr_line)
-                    if match:
-                        current_function.low_pc = int(match.group(1), 16)
-
-                elif "DW_AT_high_pc" in attr_line:
-                    match = re.search(r"0x([0-9a-fA-F]+)", attr_line)
-                    if match:
-                        current_function.high_pc = int(match.group(1), 16)
-
-                elif "DW_AT_decl_line" in attr_line:
-                    match = re.search(r"[:：]\s*(\d+)", attr_line)
-                    if match:
-                        current_function.source_line = int(match.group(1))
-
-                j += 1
-
-        # Parse formal parameter
-        elif "DW_TAG_formal_parameter" in line and current_function and in_function:
-            var = DwarfVariable(name="", is_parameter=True)
-
-            j = i + 1
-            while j < len(lines):
-                attr_line = lines[j]
-                if re.match(r"\s*<\d+><[0-9a-fA-F]+>", attr_line):
-                    break
-
-                if "DW_AT_name" in attr_line:
-                    match = re.search(r"DW_AT_name\s*[:：]\s*(\w+)", attr_line)
-                    if match:
-                        var.name = match.group(1).strip()
-
-                elif "DW_AT_type" in attr_line:
-                    ref_match = re.search(r"<0x([0-9a-fA-F]+)>", attr_line)
-                    if not ref_match:
-                        ref_match = re.search(r"<([0-9a-fA-F]+)>", attr_line)
-                    if ref_match:
-                        ref_offset = ref_match.group(1)
-                        var.type_name = type_map.get(ref_offset, "unknown")
-
-                elif "DW_AT_location" in attr_line:
-                    loc_match = re.search(r"DW_OP_reg\d+\s*\((\w+)\)", attr_line)
-                    if loc_match:
-                        var.location = loc_match.group(1)
-
-                j += 1
 
+def _read_function_die(die, type_map: Dict[int, str], arch: str) -> DwarfFunction:
+    """Build a DwarfFunction from a subprogram DIE and its children"""
+    func = DwarfFunction(name=_attr_str(die, "DW_AT_name").strip())
+    func.low_pc = _attr_int(die, "DW_AT_low_pc")
+    func.high_pc = _attr_int(die, "DW_AT_high_pc")
+    func.source_line = _attr_int(die, "DW_AT_decl_line")
+
+    for child in die.iter_children():
+        if child.tag == "DW_TAG_formal_parameter":
+            var = _read_variable_die(child, type_map, arch, is_parameter=True)
             if var.name and not var.name.startswith("__"):
-                current_function.parameters.append(var)
-                info.has_local_vars = True
+                func.parameters.append(var)
+
+    _collect_local_variables(die, func, type_map, arch)
 
-        # Parse local variable
-        elif "DW_TAG_variable" in line and current_function and in_function:
-            # Check depth - must be inside function (depth > func_depth)
-            if current_depth <= func_depth:
-                # This is a global variable, not local
-                i += 1
+    return func
+
+
+def _collect_local_variables(die, func: DwarfFunction, type_map, arch: str):
+    """Collect locals of a function, including those in nested lexical blocks"""
+    for child in die.iter_children():
+        if child.tag == "DW_TAG_variable":
+            # Skip artificial variables (compiler-generated like __result)
+            if "DW_AT_artificial" in child.attributes:
                 continue
+            var = _read_variable_die(child, type_map, arch, is_parameter=False)
+            if var.name and not var.name.startswith("__"):
+                func.local_variables.append(var)
+        elif child.has_children and child.tag != "DW_TAG_subprogram":
+            _collect_local_variables(child, func, type_map, arch)
 
-            var = DwarfVariable(name="", is_parameter=False)
-            is_artificial = False
 
-            j = i + 1
-            while j < len(lines):
-                attr_line = lines[j]
-                if re.match(r"\s*<\d+><[0-9a-fA-F]+>", attr_line):
-                    break
+def _decode(value: bytes) -> str:
+    """Decode a captured readelf field"""
+    return value.decode("utf-8", errors="replace").strip()
 
-                if "DW_AT_name" in attr_line:
-                    match = re.search(r"DW_AT_name\s*[:：]\s*(\w+)", attr_line)
-                    if match:
-                        var.name = match.group(1).strip()
 
-                elif "DW_AT_type" in attr_line:
-                    ref_match = re.search(r"<0x([0-9a-fA-F]+)>", attr_line)
-                    if not ref_match:
-                        ref_match = re.search(r"<([0-9a-fA-F]+)>", attr_line)
-                    if ref_match:
-                        ref_offset = ref_match.group(1)
-                        var.type_name = type_map.get(ref_offset, "unknown")
+# DIE tags whose attributes _build_dwarf_info() reads. Attribute lines of
+# any other DIE (struct members, lexical blocks, etc.) are dropped as soon
+# as they are matched, without being normalised or stored.
+_NAMED_TYPE_TAGS_B = frozenset(tag.encode("ascii") for tag in _NAMED_TYPE_TAGS)
+_QUALIFIER_TYPE_TAGS_B = frozenset(tag.encode("ascii") for tag in _QUALIFIER_TYPE_TAGS)
+_TYPE_TAGS_B = _NAMED_TYPE_TAGS_B | _QUALIFIER_TYPE_TAGS_B | {b"DW_TAG_pointer_type"}
+_PARSED_TAGS = _TYPE_TAGS_B | {
+    b"DW_TAG_compile_unit",
+    b"DW_TAG_subprogram",
+    b"DW_TAG_formal_parameter",
+    b"DW_TAG_variable",
+}
 
-                elif "DW_AT_location" in attr_line:
-                    loc_match = re.search(r"DW_OP_reg\d+\s*\((\w+)\)", attr_line)
-                    if loc_match:
-                        var.location = loc_match.group(1)
+# Longest pointer/qualifier/typedef chain followed when resolving a type;
+# only corrupt debug info comes anywhere near it
+_MAX_TYPE_CHAIN = 32
 
-                elif "DW_AT_artificial" in attr_line:
-                    is_artificial = True
 
-                j += 1
+def _iter_readelf_dies(output: bytes):
+    """
+    Group readelf --debug-dump=info output into DIE records in one pass.
 
-            # Skip artificial variables (compiler-generated like __result)
-            if var.name and not var.name.startswith("__") and not is_artificial:
-                current_function.local_variables.append(var)
-                info.has_local_vars = True
+    Yields (depth, offset, tag, attributes) tuples, where attributes maps
+    attribute names (e.g. b"DW_AT_name") to their raw values. The version
+    from a compilation unit header is attached to the compile unit DIE
+    that follows it as the pseudo attribute b"version".
+    """
+    die = None
+    version = None
+    keep_attrs = False
+
+    for match in _READELF_LINE_RE.finditer(output):
+        attr = match.group("attr")
+        if attr is not None:
+            if keep_attrs:
+                die[3][attr] = match.group("value")
+            continue
+
+        if match.group("depth") is None:
+            version = match.group("version")
+            continue
+
+        if die is not None:
+            yield die
+
+        attributes: Dict[bytes, bytes] = {}
+        if version is not None:
+            attributes[b"version"] = version
+            version = None
+        die = (
+            int(match.group("depth")),
+            match.group("offset"),
+            match.group("tag"),
+            attributes,
+        )
+        keep_attrs = die[2] in _PARSED_TAGS
+
+    if die is not None:
+        yield die
+
+
+def _type_ref(attributes: Dict[bytes, bytes]) -> Optional[bytes]:
+    """Return the DIE offset referenced by DW_AT_type, if any"""
+    value = attributes.get(b"DW_AT_type")
+    if value is None or b"<" not in value:
+        return None
+    match = _TYPE_REF_RE.search(value)
+    return match.group(1) if match else None
+
+
+def _resolve_readelf_type(
+    ref: Optional[bytes],
+    type_dies: Dict[bytes, Tuple[bytes, str, Optional[bytes]]],
+) -> str:
+    """Resolve a type DIE offset to a named or pointer type name"""
+    pointers = 0
+    for _ in range(_MAX_TYPE_CHAIN):
+        type_die = type_dies.get(ref)
+        if type_die is None:
+            break
+        tag, name, ref = type_die
+        if tag == b"DW_TAG_pointer_type":
+            pointers += 1
+        elif tag not in _QUALIFIER_TYPE_TAGS_B:
+            if name:
+                return name + "*" * pointers
+            break
+    return "void" + "*" * pointers if pointers else "unknown"
+
+
+def _readelf_variable(attributes: Dict[bytes, bytes], is_parameter: bool):
+    """Build a DwarfVariable from the attributes of a parameter/variable DIE"""
+    var = DwarfVariable(name="", is_parameter=is_parameter)
+
+    match = _WORD_RE.match(attributes.get(b"DW_AT_name", b""))
+    if match:
+        var.name = _decode(match.group(0))
+
+    location = attributes.get(b"DW_AT_location", b"")
+    if b"DW_OP_reg" in location:
+        loc_match = _LOC_REG_RE.search(location)
+        if loc_match:
+            var.location = sys.intern(_decode(loc_match.group(1)))
+
+    return var
 
-        # Check if we're leaving function scope
-        if current_depth >= 0 and current_depth <= func_depth and in_function:
-            if "DW_TAG_subprogram" not in line:
-                # Save current function and reset
-                if current_function and current_function.name:
-                    info.functions[current_function.name] = current_function
+
+def _readelf_function(attributes: Dict[bytes, bytes]) -> DwarfFunction:
+    """Build a DwarfFunction from the attributes of a subprogram DIE"""
+    func = DwarfFunction(name="")
+
+    fields = attributes.get(b"DW_AT_name", b"").split(None, 1)
+    if fields:
+        func.name = _decode(fields[0])
+
+    for attr in (b"DW_AT_low_pc", b"DW_AT_high_pc"):
+        value = attributes.get(attr, b"")
+        match = _HEX_RE.search(value) if b"0x" in value else None
+        if match:
+            setattr(func, attr[6:].decode("ascii"), int(match.group(1), 16))
+
+    fields = attributes.get(b"DW_AT_decl_line", b"").split(None, 1)
+    if fields and fields[0].isdigit():
+        func.source_line = int(fields[0])
+
+    return func
+
+
+def _iter_dwarfdump_dies(output: bytes):
+    """
+    Group llvm-dwarfdump --debug-info output into DIE records in one pass.
+
+    Yields the same (depth, offset, tag, attributes) tuples as
+    _iter_readelf_dies(), with values rewritten to readelf's notation so
+    both dumps share one DwarfInfo builder.
+    """
+    die = None
+    version = None
+    keep_attrs = False
+
+    for match in _DWARFDUMP_LINE_RE.finditer(output):
+        attr = match.group("attr")
+        if attr is not None:
+            if not keep_attrs:
+                continue
+            value = match.group("value")
+            if attr == b"DW_AT_type":
+                # 0x000000a8 "char *" -> <0xa8>
+                value = b"<0x%x>" % int(value.split(None, 1)[0], 16)
+            elif value.startswith(b'"'):
+                value = value[1:-1]
+            elif value.startswith(b"DW_OP_reg"):
+                # DW_OP_reg5 RDI -> DW_OP_reg5 (rdi)
+                value = _DWARFDUMP_REG_RE.sub(
+                    lambda m: m.group(1) + b" (" + m.group(2).lower() + b")", value
+                )
+            die[3][attr] = value
+            continue
+
+        if match.group("tag") is None:
+            version = b"%d" % int(match.group("version"), 16)
+            continue
+
+        if die is not None:
+            yield die
+
+        attributes: Dict[bytes, bytes] = {}
+        if version is not None:
+            attributes[b"version"] = version
+            version = None
+        die = (
+            (len(match.group("indent")) - 1) // 2,
+            b"%x" % int(match.group("offset"), 16),
+            match.group("tag"),
+            attributes,
+        )
+        keep_attrs = die[2] in _PARSED_TAGS
+
+    if die is not None:
+        yield die
+
+
+def _parse_dwarf_output(
+    output: Union[bytes, mmap.mmap], function_names: Optional[Collection[str]] = None
+) -> DwarfInfo:
+    """Parse the raw (undecoded) output of readelf --debug-dump=info"""
+    if isinstance(output, str):
+        output = output.encode("utf-8")
+    return _build_dwarf_info(_iter_readelf_dies(output), function_names)
+
+
+def _parse_dwarfdump_output(
+    output: Union[bytes, mmap.mmap], function_names: Optional[Collection[str]] = None
+) -> DwarfInfo:
+    """Parse the raw (undecoded) output of llvm-dwarfdump --debug-info --show-form"""
+    if isinstance(output, str):
+        output = output.encode("utf-8")
+    return _build_dwarf_info(_iter_dwarfdump_dies(output), function_names)
+
+
+def _build_dwarf_info(
+    dies, function_names: Optional[Collection[str]] = None
+) -> DwarfInfo:
+    """Build a DwarfInfo from (depth, offset, tag, attributes) DIE records"""
+    info = DwarfInfo()
+
+    # Type DIEs by offset, as (tag, name, referenced type offset). Variables
+    # are typed once the whole dump has been read, so references to types
+    # defined later in the CU also resolve.
+    type_dies: Dict[bytes, Tuple[bytes, str, Optional[bytes]]] = {}
+    typed_vars: List[Tuple[DwarfVariable, Optional[bytes]]] = []
+
+    current_function: Optional[DwarfFunction] = None
+    func_depth = 0
+
+    for depth, offset, tag, attributes in dies:
+        # Leaving function scope, or entering a nested function
+        if current_function is not None and (
+            depth <= func_depth or tag == b"DW_TAG_subprogram"
+        ):
+            if current_function.name:
+                info.functions[current_function.name] = current_function
+            current_function = None
+
+        if tag == b"DW_TAG_compile_unit":
+            if b"version" in attributes:
+                info.dwarf_version = int(attributes[b"version"])
+            if b"DW_AT_producer" in attributes:
+                info.compiler = _decode(attributes[b"DW_AT_producer"])
+            name = _decode(attributes.get(b"DW_AT_name", b""))
+            if name.endswith(".cpp") or name.endswith(".c"):
+                info.source_file = name
+
+        elif tag in _TYPE_TAGS_B:
+            name = attributes.get(b"DW_AT_name")
+            type_dies[offset] = (
+                tag,
+                _decode(name) if name is not None else "",
+                _type_ref(attributes),
+            )
+
+        elif tag == b"DW_TAG_subprogram":
+            current_function = _readelf_function(attributes)
+            func_depth = depth
+            # Unwanted functions are skipped along with their children
+            if (
+                function_names is not None
+                and current_function.name not in function_names
+            ):
                 current_function = None
-                in_function = False
 
-        i += 1
+        elif current_function is None:
+            continue
+
+        elif tag == b"DW_TAG_formal_parameter":
+            var = _readelf_variable(attributes, is_parameter=True)
+            if var.name and not var.name.startswith("__"):
+                current_function.parameters.append(var)
+                typed_vars.append((var, _type_ref(attributes)))
+                info.has_local_vars = True
+
+        elif tag == b"DW_TAG_variable":
+            var = _readelf_variable(attributes, is_parameter=False)
+            # Skip artificial variables (compiler-generated like __result)
+            if (
+                var.name
+                and not var.name.startswith("__")
+                and b"DW_AT_artificial" not in attributes
+            ):
+                current_function.local_variables.append(var)
+                typed_vars.append((var, _type_ref(attributes)))
+                info.has_local_vars = True
 
     # Save last function
-    if current_function and current_function.name:
+    if current_function is not None and current_function.name:
         info.functions[current_function.name] = current_function
 
+    # Resolve each referenced type once and share the interned name
+    type_names: Dict[Optional[bytes], str] = {}
+    for var, ref in typed_vars:
+        type_name = type_names.get(ref)
+        if type_name is None:
+            type_name = sys.intern(_resolve_readelf_type(ref, type_dies))
+            type_names[ref] = type_name
+        var.type_name = type_name
+
     return info
 
 
+def _format_variable(var: DwarfVariable) -> str:
+    """Format a variable as "type name", or just "name" if the type is unknown"""
+    # Type names are interned, so this is usually an identity check
+    if var.type_name != "unknown":
+        return f"{var.type_name} {var.name}"
+    return var.name
+
+
 def generate_variable_comment(func: DwarfFunction) -> str:
     """
     Generate a comment string with original variable names.
@@ -314,22 +787,15 @@ def generate_variable_comment(func: DwarfFunction) -> str:
     parts = []
 
     if func.parameters:
-        param_strs = []
-        for p in func.parameters:
-            if p.type_name != "unknown":
-                param_strs.append(f"{p.type_name} {p.name}")
-            else:
-                param_strs.append(p.name)
-        parts.append(f"Original params: {', '.join(param_strs)}")
+        param_strs = ", ".join(map(_format_variable, func.parameters))
+        parts.append(f"Original params: {param_strs}")
 
     if func.local_variables:
-        var_strs = []
-        for v in func.local_variables[:8]:  # Limit to 8 vars
-            if v.type_name != "unknown":
-                var_strs.append(f"{v.type_name} {v.name}")
-            else:
-                var_strs.append(v.name)
-        comment = f"Original locals: {', '.join(var_strs)}"
+        # Limit to 8 vars
+        var_strs = ", ".join(
+            map(_format_variable, itertools.islice(func.local_variables, 8))
+        )
+        comment = f"Original locals: {var_strs}"
         if len(func.local_variables) > 8:
             comment += f" + {len(func.local_variables) - 8} more"
         parts.append(comment)
@@ -340,6 +806,51 @@ def generate_variable_comment(func: DwarfFunction) -> str:
     return "/* " + " | ".join(parts) + " */"
 
 
+def find_function_names(code: str) -> Set[str]:
+    """
+    Find the names of functions that may be defined in decompiled code.
+
+    The result can be passed to parse_dwarf_info() so only the functions
+    apply_dwarf_to_code() can actually use are parsed.
+    """
+    return set(_FUNC_NAME_RE.findall(code))
+
+
+@functools.lru_cache(maxsize=4096)
+def _make_param_substituter(
+    param_names: Tuple[str, ...],
+) -> Optional[Callable[[str], str]]:
+    """
+    Return a function rewriting param_N to the original parameter names in
+    a single pass, or None if there are no parameters. Cached, since the same
+    signatures recur across functions and files.
+    """
+    if not param_names:
+        return None
+
+    # param_N index -> original name
+    param_table = {str(idx + 1): name for idx, name in enumerate(param_names)}
+
+    def param_replacer(match):
+        return param_table.get(match.group(1), match.group(0))
+
+    def substitute(line: str) -> str:
+        return _PARAM_RE.sub(param_replacer, line)
+
+    return substitute
+
+
+def _build_locals_comment(func: DwarfFunction) -> str:
+    """Build the "Original locals" comment for a function, or "" if none"""
+    if not func.local_variables:
+        return ""
+
+    var_strs = [v.name for v in func.local_variables[:10]]
+    if len(func.local_variables) > 10:
+        var_strs.append(f"+{len(func.local_variables) - 10} more")
+    return f"/* Original locals: {', '.join(var_strs)} */"
+
+
 def apply_dwarf_to_code(code: str, dwarf_info: DwarfInfo) -> str:
     """
     Apply DWARF debug information to decompiled code.
@@ -357,68 +868,75 @@ def apply_dwarf_to_code(code: str, dwarf_info: DwarfInfo) -> str:
     if not dwarf_info.functions:
         return code
 
-    # First pass: identify function boundaries and apply substitutions
+    # Rewrite only the lines that change; untouched lines are not copied
     lines = code.split("\n")
-    result_lines = []
+    modified = False
+
+    # Per-function param_N substituter and locals comment, built once up front
+    func_tables = {
+        name: (
+            _make_param_substituter(tuple(p.name for p in func.parameters)),
+            _build_locals_comment(func),
+        )
+        for name, func in dwarf_info.functions.items()
+    }
 
     current_dwarf_func = None
+    substitute_params: Optional[Callable[[str], str]] = None
+    locals_comment = ""
+
     brace_depth = 0
     in_function_body = False
 
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        modified_line = line
-
-        # Track brace depth for function body detection
-        open_braces = line.count("{")
-        close_braces = line.count("}")
-
-        # Look for function definitions
-        func_match = re.match(r"^(\w+)\s+(\w+)\s*\(", line.strip())
-        if func_match and brace_depth == 0:
+    for i, line in enumerate(lines):
+        # Track brace depth for function body detection; most lines have no
+        # braces at all, so only count them when one is present
+        has_open = "{" in line
+        if has_open or "}" in line:
+            brace_delta = line.count("{") - line.count("}")
+        else:
+            brace_delta = 0
+
+        # Look for function definitions (only possible at file scope, and
+        # only on lines with a parenthesis)
+        if brace_depth == 0 and "(" in line:
+            func_match = _FUNC_SIG_RE.match(line.strip())
+        else:
+            func_match = None
+        if func_match:
             func_name = func_match.group(2)
-
-            if func_name in dwarf_info.functions:
+            entry = func_tables.get(func_name)
+            if entry is not None:
                 current_dwarf_func = dwarf_info.functions[func_name]
+                substitute_params, locals_comment = entry
 
-                # Substitute parameter names in signature
-                if current_dwarf_func.parameters:
-                    for idx, param in enumerate(current_dwarf_func.parameters):
-                        param_pattern = rf"\bparam_{idx + 1}\b"
-                        modified_line = re.sub(param_pattern, param.name, modified_line)
-
-        # If we're in a function with DWARF info, substitute param names in body
-        if current_dwarf_func and current_dwarf_func.parameters:
-            for idx, param in enumerate(current_dwarf_func.parameters):
-                param_pattern = rf"\bparam_{idx + 1}\b"
-                modified_line = re.sub(param_pattern, param.name, modified_line)
-
-        result_lines.append(modified_line)
+        # If we're in a function with DWARF info, substitute param names in
+        # the signature and body
+        if current_dwarf_func and substitute_params and "param_" in line:
+            lines[i] = substitute_params(line)
+            modified = True
 
         # Update brace depth
-        brace_depth += open_braces - close_braces
+        brace_depth += brace_delta
 
         # Add comment after opening brace of function
-        if current_dwarf_func and "{" in line and not in_function_body:
+        if current_dwarf_func and has_open and not in_function_body:
             in_function_body = True
-            # Add locals comment if we have local variables
-            if current_dwarf_func.local_variables:
-                var_strs = [v.name for v in current_dwarf_func.local_variables[:10]]
-                if len(current_dwarf_func.local_variables) > 10:
-                    var_strs.append(
-                        f"+{len(current_dwarf_func.local_variables) - 10} more"
-                    )
-                result_lines.append(f"/* Original locals: {', '.join(var_strs)} */")
+            # Add locals comment if we have local variables; appended to the
+            # brace line so line indices stay stable
+            if locals_comment:
+                lines[i] += "\n" + locals_comment
+                modified = True
 
         # Reset when function ends
         if brace_depth == 0 and in_function_body:
             current_dwarf_func = None
             in_function_body = False
 
-        i += 1
+    if not modified:
+        return code
 
-    return "\n".join(result_lines)
+    return "\n".join(lines)
 
 
 def create_variable_mapping(dwarf_info: DwarfInfo) -> Dict[str, Dict[str, str]]:
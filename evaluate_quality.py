@@ -20,14 +20,23 @@ Usage:
 """
 
 import argparse
+import fnmatch
 import glob
+import hashlib
+import heapq
 import json
 import os
 import re
 import sys
-from dataclasses import dataclass, field
+import tempfile
+from dataclasses import asdict, dataclass, field
+from multiprocessing import Pool, cpu_count
+from operator import itemgetter
 from typing import List, Tuple
 
+# Slotted dataclasses (no per-instance __dict__) where supported (3.10+)
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
 
 class Colors:
     """ANSI color codes"""
@@ -42,7 +51,7 @@ class Colors:
     NC = "\033[0m"
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class FileMetrics:
     """Metrics for a single decompiled file"""
 
@@ -87,40 +96,29 @@ class FileMetrics:
     @property
     def quality_score(self) -> float:
         """Calculate a quality score (0-100)"""
-        score = 100.0
-
-        # Major penalties
-        if self.halt_baddata > 0:
-            score -= min(50, self.halt_baddata * 10)
-
-        # Minor penalties
-        score -= min(10, self.undefined_types * 0.5)
-        score -= min(10, self.excessive_casts * 0.2)
-        score -= min(5, self.goto_statements * 1)
-        score -= min(10, self.inline_assembly * 5)
-
-        # Bonuses
-        if self.demangled_names > 0:
-            score += min(5, self.demangled_names * 0.1)
-        if self.namespaces_found:
-            score += 3
-        if self.source_file_refs:
-            score += 2
-
-        # Debug info bonus (significant - up to 15 points)
-        if self.preserved_var_names > 0:
-            # Bonus based on ratio of preserved names
-            debug_bonus = self.debug_info_ratio * 15
-            score += debug_bonus
-
-        # Extra bonus if debug info comment is present
-        if self.has_debug_info_comment:
-            score += 2
-
-        return max(0, min(100, score))
+        # Each term is already 0 when its counter is 0, so no branches needed
+        score = (
+            100.0
+            # Major penalties
+            - min(50.0, self.halt_baddata * 10.0)
+            # Minor penalties
+            - min(10.0, self.undefined_types * 0.5)
+            - min(10.0, self.excessive_casts * 0.2)
+            - min(5.0, self.goto_statements * 1.0)
+            - min(10.0, self.inline_assembly * 5.0)
+            # Bonuses
+            + min(5.0, self.demangled_names * 0.1)
+            + 3.0 * bool(self.namespaces_found)
+            + 2.0 * bool(self.source_file_refs)
+            # Debug info bonus (significant - up to 15 points)
+            + self.debug_info_ratio * 15.0
+            # Extra bonus if debug info comment is present
+            + 2.0 * self.has_debug_info_comment
+        )
+        return 0.0 if score < 0.0 else (100.0 if score > 100.0 else score)
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class ProjectMetrics:
     """Aggregate metrics for a decompiled project"""
 
@@ -149,6 +147,8 @@ class ProjectMetrics:
 
     # File details
     file_metrics: List[FileMetrics] = field(default_factory=list)
+    # quality_score of each file_metrics entry, computed once in analysis
+    file_scores: List[float] = field(default_factory=list)
     worst_files: List[Tuple[str, float]] = field(default_factory=list)
 
 
@@ -183,6 +183,125 @@ PATTERNS = {
     ),
 }
 
+# Counters that need character classes, tallied in a single scan.
+# Literal-anchored counters use _count() instead. A demangled_name match
+# ends with the "(" that may also open an excessive_cast, e.g.
+# "A::f(int *)(p)", so in the combined scan it only looks ahead for that
+# "(". The counts then equal those of separate scans.
+COUNTED_PATTERNS = (
+    "excessive_cast",
+    "raw_pointer_arithmetic",
+    "demangled_name",
+)
+_COMBINED_SOURCES = {
+    "excessive_cast": PATTERNS["excessive_cast"].pattern,
+    "raw_pointer_arithmetic": PATTERNS["raw_pointer_arithmetic"].pattern,
+    "demangled_name": r"::\w+\s*(?=\()",
+}
+COMBINED_PATTERN = re.compile(
+    "|".join(f"(?P<{name}>{_COMBINED_SOURCES[name]})" for name in COUNTED_PATTERNS)
+)
+
+# Literal that every match of a pattern contains. A substring check is much
+# cheaper than a regex scan, so files without it skip that pattern entirely.
+PATTERN_LITERALS = {
+    "halt_baddata": "halt_baddata",
+    "undefined_type": "undefined",
+    "goto": "goto",
+    "inline_asm": "asm",
+    "stack_chk": "__stack_chk_fail",
+    "namespace": "namespace",
+    "class_comment": "Class:",
+    "function_comment": "Function:",
+    "source_file": "framework/source/",
+    "debug_info_comment": "Debug Information",
+    "auto_var_local": "local_",
+    "auto_var_param": "param_",
+    "auto_var_uvar": "Var",
+    "auto_var_pvar": "pVar",
+    "auto_var_in": "in_",
+}
+
+
+def _finditer(name: str, content: str):
+    """finditer() for a pattern, skipped if its literal is absent"""
+    if PATTERN_LITERALS[name] not in content:
+        return iter(())
+    return PATTERNS[name].finditer(content)
+
+
+def _count(name: str, content: str) -> int:
+    """
+    Count the matches of a pattern. Pure literals are counted with
+    str.count(); other patterns only run when their literal is present.
+    """
+    literal = PATTERN_LITERALS[name]
+    if PATTERNS[name].pattern == literal:
+        return content.count(literal)
+    if literal not in content:
+        return 0
+    return len(PATTERNS[name].findall(content))
+
+
+# Per-directory cache of FileMetrics keyed by file name and (mtime, size), so
+# repeated runs only re-analyze changed files. Only used with
+# LIBSURGEON_CACHE=1, and kept next to the DWARF cache rather than in the
+# analyzed output directory. Bump the version when FileMetrics or the
+# analysis changes.
+QUALITY_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "libsurgeon",
+    "quality",
+)
+_QUALITY_CACHE_VERSION = 2
+
+
+def _quality_cache_file(directory: str) -> str:
+    """Return the cache file for an analyzed directory"""
+    digest = hashlib.sha1(os.path.abspath(directory).encode("utf-8"))
+    return os.path.join(QUALITY_CACHE_DIR, digest.hexdigest() + ".json")
+
+
+def _load_quality_cache(cache_file: str) -> dict:
+    """Load cached file entries, or an empty dict if missing or unreadable"""
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != _QUALITY_CACHE_VERSION:
+        return {}
+    files = data.get("files")
+    return files if isinstance(files, dict) else {}
+
+
+def _store_quality_cache(cache_file: str, files: dict):
+    """Write the cache atomically; failures only cost a re-analysis later"""
+    data = {"version": _QUALITY_CACHE_VERSION, "files": files}
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w",
+            encoding="utf-8",
+            dir=os.path.dirname(cache_file),
+            suffix=".tmp",
+            delete=False,
+        ) as f:
+            json.dump(data, f)
+        os.replace(f.name, cache_file)
+    except OSError:
+        pass
+
+
+def _cached_metrics(entry, filepath: str, stamp: List[int]):
+    """Rehydrate cached FileMetrics if the entry matches the file's stamp"""
+    if not isinstance(entry, dict) or entry.get("stamp") != stamp:
+        return None
+    try:
+        return FileMetrics(**dict(entry["metrics"], filepath=filepath))
+    except (KeyError, TypeError):
+        return None
+
 
 def analyze_file(filepath: str) -> FileMetrics:
     """Analyze a single decompiled source file"""
@@ -191,45 +310,51 @@ def analyze_file(filepath: str) -> FileMetrics:
     try:
         with open(filepath, "r", encoding="utf-8", errors="replace") as f:
             content = f.read()
-            lines = content.split("\n")
     except Exception as e:
         metrics.issues.append(f"Could not read file: {e}")
         return metrics
 
-    metrics.lines = len(lines)
+    # Same as len(content.split("\n")), without building the line list
+    metrics.lines = content.count("\n") + 1
 
     # Count patterns
-    metrics.halt_baddata = len(PATTERNS["halt_baddata"].findall(content))
-    metrics.undefined_types = len(PATTERNS["undefined_type"].findall(content))
-    metrics.excessive_casts = len(PATTERNS["excessive_cast"].findall(content))
-    metrics.raw_pointers = len(PATTERNS["raw_pointer_arithmetic"].findall(content))
-    metrics.goto_statements = len(PATTERNS["goto"].findall(content))
-    metrics.inline_assembly = len(PATTERNS["inline_asm"].findall(content))
-    metrics.stack_chk_fail = len(PATTERNS["stack_chk"].findall(content))
+    counts = dict.fromkeys(COUNTED_PATTERNS, 0)
+    for match in COMBINED_PATTERN.finditer(content):
+        counts[match.lastgroup] += 1
+
+    metrics.halt_baddata = _count("halt_baddata", content)
+    metrics.undefined_types = _count("undefined_type", content)
+    metrics.excessive_casts = counts["excessive_cast"]
+    metrics.raw_pointers = counts["raw_pointer_arithmetic"]
+    metrics.goto_statements = _count("goto", content)
+    metrics.inline_assembly = _count("inline_asm", content)
+    metrics.stack_chk_fail = _count("stack_chk", content)
 
     # Positive patterns
-    metrics.demangled_names = len(PATTERNS["demangled_name"].findall(content))
+    metrics.demangled_names = counts["demangled_name"]
 
-    # Find namespaces
-    for match in PATTERNS["namespace"].finditer(content):
+    # Find namespaces (in order of first appearance)
+    seen = set()
+    for match in _finditer("namespace", content):
         ns = match.group(1)
-        if ns not in metrics.namespaces_found:
+        if ns not in seen:
+            seen.add(ns)
             metrics.namespaces_found.append(ns)
 
     # Find source file references (from assert messages)
-    for match in PATTERNS["source_file"].finditer(content):
+    seen = set()
+    for match in _finditer("source_file", content):
         ref = match.group(0)
-        if ref not in metrics.source_file_refs:
+        if ref not in seen:
+            seen.add(ref)
             metrics.source_file_refs.append(ref)
 
     # Count classes and functions from comments
-    metrics.classes = len(PATTERNS["class_comment"].findall(content))
-    metrics.functions = len(PATTERNS["function_comment"].findall(content))
+    metrics.classes = _count("class_comment", content)
+    metrics.functions = _count("function_comment", content)
 
     # Debug info analysis
-    metrics.has_debug_info_comment = bool(
-        PATTERNS["debug_info_comment"].search(content)
-    )
+    metrics.has_debug_info_comment = any(_finditer("debug_info_comment", content))
 
     # Count auto-generated variable names
     auto_vars = set()
@@ -240,7 +365,7 @@ def analyze_file(filepath: str) -> FileMetrics:
         "auto_var_pvar",
         "auto_var_in",
     ]:
-        for match in PATTERNS[pattern_name].finditer(content):
+        for match in _finditer(pattern_name, content):
             auto_vars.add(match.group(0))
     metrics.auto_generated_vars = len(auto_vars)
 
@@ -285,7 +410,9 @@ def analyze_file(filepath: str) -> FileMetrics:
     return metrics
 
 
-def analyze_directory(directory: str, file_pattern: str = "*.c*") -> ProjectMetrics:
+def analyze_directory(
+    directory: str, file_pattern: str = "*.c*", num_workers: int = 0
+) -> ProjectMetrics:
     """
     Analyze all decompiled files in a directory.
 
@@ -293,12 +420,32 @@ def analyze_directory(directory: str, file_pattern: str = "*.c*") -> ProjectMetr
         directory: Directory containing decompiled source files
         file_pattern: Glob pattern for files to analyze.
                       Default "*.c*" matches both *.c and *.cpp files.
+        num_workers: Number of worker processes (0 for one per CPU)
     """
     project = ProjectMetrics(directory=directory)
 
-    # Find all matching files
-    pattern = os.path.join(directory, file_pattern)
-    files = sorted(glob.glob(pattern))
+    # Find all matching files. A plain file name pattern needs only one
+    # directory read; hidden files are skipped unless the pattern starts
+    # with a dot, as glob would. Patterns with a directory part use glob.
+    if os.sep in file_pattern or (os.altsep and os.altsep in file_pattern):
+        files = sorted(
+            path
+            for path in glob.glob(os.path.join(directory, file_pattern))
+            if os.path.isfile(path)
+        )
+    else:
+        hidden = file_pattern.startswith(".")
+        try:
+            with os.scandir(directory) as entries:
+                files = sorted(
+                    entry.path
+                    for entry in entries
+                    if (hidden or not entry.name.startswith("."))
+                    and fnmatch.fnmatch(entry.name, file_pattern)
+                    and entry.is_file()
+                )
+        except OSError:
+            files = []
 
     if not files:
         print(
@@ -307,12 +454,53 @@ def analyze_directory(directory: str, file_pattern: str = "*.c*") -> ProjectMetr
         return project
 
     project.total_files = len(files)
-    quality_scores = []
 
     print(f"{Colors.CYAN}Analyzing {len(files)} files...{Colors.NC}")
 
+    # Reuse cached metrics for files unchanged since the last run
+    use_cache = os.environ.get("LIBSURGEON_CACHE") == "1"
+    cache_file = _quality_cache_file(directory)
+    cache = _load_quality_cache(cache_file) if use_cache else {}
+    stamps = {}
+    cached = {}
     for filepath in files:
-        metrics = analyze_file(filepath)
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            continue
+        stamps[filepath] = [st.st_mtime_ns, st.st_size]
+        metrics = _cached_metrics(
+            cache.get(os.path.relpath(filepath, directory)),
+            filepath,
+            stamps[filepath],
+        )
+        if metrics is not None:
+            cached[filepath] = metrics
+    stale = [filepath for filepath in files if filepath not in cached]
+
+    # Files are independent, so scan them in parallel
+    num_workers = min(num_workers or cpu_count(), len(stale))
+    if num_workers > 1:
+        with Pool(num_workers) as pool:
+            analyzed = pool.map(analyze_file, stale, chunksize=8)
+    else:
+        analyzed = [analyze_file(filepath) for filepath in stale]
+    cached.update(zip(stale, analyzed))
+    all_metrics = [cached[filepath] for filepath in files]
+
+    if use_cache and (analyzed or len(cache) != len(stamps)):
+        _store_quality_cache(
+            cache_file,
+            {
+                os.path.relpath(filepath, directory): {
+                    "stamp": stamps[filepath],
+                    "metrics": asdict(cached[filepath]),
+                }
+                for filepath in stamps
+            },
+        )
+
+    for metrics in all_metrics:
         project.file_metrics.append(metrics)
 
         # Aggregate
@@ -332,27 +520,35 @@ def analyze_directory(directory: str, file_pattern: str = "*.c*") -> ProjectMetr
         if metrics.halt_baddata > 0:
             project.files_with_halt_baddata += 1
 
-        score = metrics.quality_score
-        quality_scores.append(score)
-        project.min_quality_score = min(project.min_quality_score, score)
-        project.max_quality_score = max(project.max_quality_score, score)
+        project.file_scores.append(metrics.quality_score)
 
-    # Calculate averages
+    # Calculate averages and range
+    quality_scores = project.file_scores
     if quality_scores:
         project.avg_quality_score = sum(quality_scores) / len(quality_scores)
+        project.min_quality_score = min(quality_scores)
+        project.max_quality_score = max(quality_scores)
 
     # Calculate debug info ratio
     total_vars = project.total_preserved_vars + project.total_auto_generated_vars
     if total_vars > 0:
         project.avg_debug_info_ratio = project.total_preserved_vars / total_vars
 
-    # Find worst files
-    scored_files = [(m.filename, m.quality_score) for m in project.file_metrics]
-    project.worst_files = sorted(scored_files, key=lambda x: x[1])[:10]
+    # Find worst files, reusing the scores computed above
+    scored_files = zip((m.filename for m in project.file_metrics), quality_scores)
+    project.worst_files = heapq.nsmallest(10, scored_files, key=itemgetter(1))
 
     return project
 
 
+def _scored_files(project: ProjectMetrics) -> List[Tuple[float, FileMetrics]]:
+    """Pair each file's metrics with its score, reusing scores from analysis"""
+    scores = project.file_scores
+    if len(scores) != len(project.file_metrics):
+        scores = [m.quality_score for m in project.file_metrics]
+    return list(zip(scores, project.file_metrics))
+
+
 def print_report(project: ProjectMetrics, verbose: bool = False):
     """Print a formatted quality report"""
     print()
@@ -440,17 +636,16 @@ def print_report(project: ProjectMetrics, verbose: bool = False):
         print(f"{'File':<40} {'Lines':>8} {'Score':>6} {'Issues':>8}")
         print("-" * 70)
 
-        for m in sorted(project.file_metrics, key=lambda x: x.quality_score):
-            score = m.quality_score
-            color = (
-                Colors.GREEN
-                if score >= 80
-                else (Colors.YELLOW if score >= 50 else Colors.RED)
-            )
+        # Colors are hoisted out of the loop and lines are written in one go
+        green, yellow, red, nc = Colors.GREEN, Colors.YELLOW, Colors.RED, Colors.NC
+        lines = []
+        for score, m in sorted(_scored_files(project), key=itemgetter(0)):
+            color = green if score >= 80 else (yellow if score >= 50 else red)
             issues = m.halt_baddata + (1 if m.undefined_types > 50 else 0)
-            print(
-                f"{m.filename:<40} {m.lines:>8} {color}{score:>5.1f}{Colors.NC} {issues:>8}"
+            lines.append(
+                f"{m.filename:<40} {m.lines:>8} {color}{score:>5.1f}{nc} {issues:>8}\n"
             )
+        sys.stdout.write("".join(lines))
         print()
 
     # Quality Grade
@@ -502,7 +697,7 @@ def export_json(project: ProjectMetrics, output_path: str):
             {
                 "filename": m.filename,
                 "lines": m.lines,
-                "quality_score": m.quality_score,
+                "quality_score": score,
                 "halt_baddata": m.halt_baddata,
                 "functions": m.functions,
                 "namespaces": m.namespaces_found,
@@ -514,7 +709,7 @@ def export_json(project: ProjectMetrics, output_path: str):
                 "debug_info_ratio": m.debug_info_ratio,
                 "has_debug_info_comment": m.has_debug_info_comment,
             }
-            for m in project.file_metrics
+            for score, m in _scored_files(project)
         ],
     }
 
@@ -565,6 +760,13 @@ Examples:
         default="*.c*",
         help="File pattern to match (default: *.c* matches both .c and .cpp)",
     )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=0,
+        help="Number of worker processes (default: CPU count)",
+    )
 
     args = parser.parse_args()
 
@@ -582,7 +784,7 @@ Examples:
             print(f"Issues: {', '.join(metrics.issues)}")
     elif os.path.isdir(args.path):
         # Directory analysis
-        project = analyze_directory(args.path, args.pattern)
+        project = analyze_directory(args.path, args.pattern, args.workers)
         grade = print_report(project, args.verbose)
 
         if args.json:
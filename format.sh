@@ -35,15 +35,17 @@ while [[ $# -gt 0 ]]; do
     esac
 done
 
-# Find Python files
-FILES=$(find . -name "*.py" \
-    ! -path "./.venv/*" \
-    ! -path "./venv/*" \
-    ! -path "./__pycache__/*" \
-    ! -path "./.git/*" \
-    ! -path "./build/*" \
-    ! -path "./dist/*" \
-    ! -path "./*.egg-info/*" \
+# Find Python files in one traversal, pruning excluded directories instead
+# of walking them and filtering their contents afterwards
+FILES=$(find . \( \
+    -path "./.venv" -o \
+    -path "./venv" -o \
+    -path "./__pycache__" -o \
+    -path "./.git" -o \
+    -path "./build" -o \
+    -path "./dist" -o \
+    -path "./*.egg-info" \
+    \) -prune -o -name "*.py" -print \
     | sort)
 
 FILE_COUNT=$(echo "$FILES" | wc -l)
@@ -99,7 +101,7 @@ echo -e "${BLUE}━━━━━━━━━━━━━━━━━━━━━
 echo -e "${BLUE}  Linting (flake8)${NC}"
 echo -e "${BLUE}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━${NC}"
 if command -v flake8 &> /dev/null || python -m flake8 --version &> /dev/null; then
-    if python -m flake8 --max-line-length 88 --extend-ignore E203,E501,W503 $FILES; then
+    if python -m flake8 --jobs auto --max-line-length 88 --extend-ignore E203,E501,W503 $FILES; then
         echo -e "${GREEN}✓ flake8: no issues${NC}"
     else
         echo -e "${RED}✗ flake8: issues found${NC}"
@@ -12,6 +12,15 @@ Note: This module runs in Ghidra's Jython environment and uses Ghidra's API.
 
 import os
 import re
+from operator import itemgetter
+
+# Ghidra's demangler, only importable inside Ghidra
+try:
+    from ghidra.app.util.demangler import DemanglerUtil
+
+    HAS_DEMANGLER = True
+except ImportError:
+    HAS_DEMANGLER = False
 
 # Ghidra undefined type to standard C type mapping
 # For 'undefined' types, we use custom typedefs (unk8_t, unk16_t, etc.)
@@ -51,6 +60,56 @@ GHIDRA_TYPE_MAP = {
     "pointer": "void *",
 }
 
+# Single pattern matching any GHIDRA_TYPE_MAP key as a whole word, so
+# normalize_code_types makes one pass over the code. Longer names come first
+# in the alternation.
+TYPE_NORMALIZE_PATTERN = re.compile(
+    r"\b(?:"
+    + "|".join(re.escape(t) for t in sorted(GHIDRA_TYPE_MAP, key=len, reverse=True))
+    + r")\b"
+)
+
+# Patterns used per function or per module, compiled once at import since
+# Jython's re cache is small and its lookups are slow
+# Any run of characters other than word characters and '-' (illegal path
+# characters and whitespace included), together with adjacent underscores
+SANITIZE_PATTERN = re.compile(r"(?:[^\w\-]|_)+")
+METHOD_CLASS_PATTERN = re.compile(
+    r"(?:[\w\s\*]+\s+)?(?:__thiscall\s+)?(\w+(?:::\w+)*)::\w+\s*\("
+)
+FIELD_PATTERN = re.compile(r"field_0x[0-9a-fA-F]+")
+# Unknown struct fields (ptr->field_0xNN) and vtable calls
+# (*(func_ptr_type *)(*obj + offset))(), found in one pass
+FIELD_OR_VTABLE_PATTERN = re.compile(
+    r"(?P<field>field_0x[0-9a-fA-F]+)"
+    r"|\(\*\*\(\w+\s*\*\*\)\(\*?\(?\w+\)?\s*\+\s*(?P<offset>0x[0-9a-fA-F]+)\)\)"
+)
+
+# Write buffer for decompiled source files, so output reaches the Java
+# stream in large chunks instead of once or twice per function
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+# Per-function decompiler timeout in seconds. A single pathological
+# function can stall the run for this long, so LIBSURGEON_DECOMPILE_TIMEOUT
+# lets callers trade completeness for a shorter critical path.
+DEFAULT_DECOMPILE_TIMEOUT = 60
+
+
+def get_decompile_timeout():
+    """Read LIBSURGEON_DECOMPILE_TIMEOUT, falling back to the default"""
+    try:
+        timeout = int(
+            os.environ.get("LIBSURGEON_DECOMPILE_TIMEOUT", DEFAULT_DECOMPILE_TIMEOUT)
+        )
+    except ValueError:
+        return DEFAULT_DECOMPILE_TIMEOUT
+    if timeout <= 0:
+        return DEFAULT_DECOMPILE_TIMEOUT
+    return timeout
+
+
+DECOMPILE_TIMEOUT = get_decompile_timeout()
+
 # Unknown type definitions - these go into _types.h
 # Default to signed types (more common in embedded code)
 UNKNOWN_TYPE_DEFS = """
@@ -81,11 +140,21 @@ typedef intptr_t unkptr_t;  /* undefined pointer-sized value */
 # ============================================================
 
 
+# Normalized types by Ghidra type string. Struct fields and typedefs refer
+# to the same few primitive types over and over.
+_NORMALIZED_TYPE_CACHE = {}
+_NORMALIZED_TYPE_CACHE_MAX = 50000
+
+
 def normalize_ghidra_type(type_str):
     """Convert Ghidra-specific types to standard C types"""
     if not type_str:
         return type_str
 
+    cached = _NORMALIZED_TYPE_CACHE.get(type_str)
+    if cached is not None:
+        return cached
+
     # Handle pointer types first
     ptr_count = type_str.count("*")
     base_type = type_str.replace("*", "").strip()
@@ -96,8 +165,11 @@ def normalize_ghidra_type(type_str):
 
     # Reconstruct with pointers
     if ptr_count > 0:
-        return base_type + " " + "*" * ptr_count
+        base_type = base_type + " " + "*" * ptr_count
 
+    if len(_NORMALIZED_TYPE_CACHE) >= _NORMALIZED_TYPE_CACHE_MAX:
+        _NORMALIZED_TYPE_CACHE.clear()
+    _NORMALIZED_TYPE_CACHE[type_str] = base_type
     return base_type
 
 
@@ -107,12 +179,7 @@ def normalize_code_types(code):
         return code
 
     # Apply type mappings using word boundaries
-    for ghidra_type, c_type in GHIDRA_TYPE_MAP.items():
-        # Use word boundary to avoid partial replacements
-        pattern = r"\b" + re.escape(ghidra_type) + r"\b"
-        code = re.sub(pattern, c_type, code)
-
-    return code
+    return TYPE_NORMALIZE_PATTERN.sub(lambda m: GHIDRA_TYPE_MAP[m.group(0)], code)
 
 
 # ============================================================
@@ -120,6 +187,12 @@ def normalize_code_types(code):
 # ============================================================
 
 
+# Demangled names by mangled name. The same symbols (vtables, thunks, inline
+# helpers) come up many times per program, and each lookup is a Java call.
+_DEMANGLE_CACHE = {}
+_DEMANGLE_CACHE_MAX = 50000
+
+
 def demangle_cpp_name(mangled_name, program):
     """
     Attempt to demangle C++ mangled names.
@@ -131,15 +204,32 @@ def demangle_cpp_name(mangled_name, program):
     Returns:
         Demangled name or original if demangling fails
     """
-    try:
-        from ghidra.app.util.demangler import DemanglerUtil
+    # Only Itanium C++ ABI names (_Z...) are mangled; skip the Java call
+    if not HAS_DEMANGLER or not mangled_name.startswith("_Z"):
+        return mangled_name
+
+    cached = _DEMANGLE_CACHE.get(mangled_name)
+    if cached is not None:
+        return cached
 
+    result = mangled_name
+    try:
         demangled = DemanglerUtil.demangle(program, mangled_name)
         if demangled:
-            return demangled.getSignature(False)
+            result = demangled.getSignature(False)
     except:
         pass
-    return mangled_name
+
+    if len(_DEMANGLE_CACHE) >= _DEMANGLE_CACHE_MAX:
+        _DEMANGLE_CACHE.clear()
+    _DEMANGLE_CACHE[mangled_name] = result
+    return result
+
+
+# Sanitized names by original name. Each module name is sanitized for its
+# source file, its header and its master header include.
+_SAFE_NAME_CACHE = {}
+_SAFE_NAME_CACHE_MAX = 50000
 
 
 def sanitize_filename(name):
@@ -152,15 +242,19 @@ def sanitize_filename(name):
     Returns:
         Sanitized filename safe for filesystem use
     """
-    name = re.sub(r'[<>:"/\\|?*]', "_", name)
-    name = re.sub(r"\s+", "_", name)
-    name = re.sub(r"[^\w\-]", "_", name)
-    # Collapse multiple underscores
-    name = re.sub(r"_+", "_", name)
-    name = name.strip("_")
-    if len(name) > 100:
-        name = name[:100]
-    return name
+    cached = _SAFE_NAME_CACHE.get(name)
+    if cached is not None:
+        return cached
+
+    # Replace each run of illegal characters and underscores with one "_"
+    safe_name = SANITIZE_PATTERN.sub("_", name).strip("_")
+    if len(safe_name) > 100:
+        safe_name = safe_name[:100]
+
+    if len(_SAFE_NAME_CACHE) >= _SAFE_NAME_CACHE_MAX:
+        _SAFE_NAME_CACHE.clear()
+    _SAFE_NAME_CACHE[name] = safe_name
+    return safe_name
 
 
 def extract_class_name(func_name):
@@ -190,13 +284,18 @@ def extract_namespace(func_name):
     Returns:
         Namespace or None if not found
     """
-    if "::" in func_name:
-        parts = func_name.split("::")
-        if len(parts) >= 1:
-            return parts[0]
+    namespace, sep, _ = func_name.partition("::")
+    if sep:
+        return namespace
     return None
 
 
+# Class names by method display name. Each method is looked up once while
+# collecting classes and again when its decompiled body is written.
+_METHOD_CLASS_CACHE = {}
+_METHOD_CLASS_CACHE_MAX = 50000
+
+
 def extract_class_from_method(display_name):
     """
     Extract class name from a method signature.
@@ -212,21 +311,28 @@ def extract_class_from_method(display_name):
     Returns:
         Class name or None if not a method
     """
+    # Both patterns below need a scope separator; most names have none
+    if "::" not in display_name:
+        return None
+
+    cached = _METHOD_CLASS_CACHE.get(display_name)
+    if cached is not None:
+        return cached
+
     # Remove return type prefix
-    match = re.match(
-        r"(?:[\w\s\*]+\s+)?(?:__thiscall\s+)?(\w+(?:::\w+)*)::\w+\s*\(", display_name
-    )
+    match = METHOD_CLASS_PATTERN.match(display_name)
     if match:
-        return match.group(1)
-
-    # Try simpler pattern for mangled names
-    if "::" in display_name:
+        class_name = match.group(1)
+    else:
+        # Try simpler pattern for mangled names
         parts = display_name.split("::")
-        if len(parts) >= 2:
-            # Return everything except the last part (method name)
-            return "::".join(parts[:-1]).split("(")[0].strip()
+        # Return everything except the last part (method name)
+        class_name = "::".join(parts[:-1]).split("(")[0].strip()
 
-    return None
+    if len(_METHOD_CLASS_CACHE) >= _METHOD_CLASS_CACHE_MAX:
+        _METHOD_CLASS_CACHE.clear()
+    _METHOD_CLASS_CACHE[display_name] = class_name
+    return class_name
 
 
 # ============================================================
@@ -248,7 +354,24 @@ SKIP_FUNCTION_PATTERNS = [
 ]
 
 
-def should_skip_function(func, program):
+def get_skip_block_names(memory):
+    """
+    Get the names of memory blocks whose functions are skipped.
+
+    Args:
+        memory: Ghidra Memory object (program.getMemory())
+
+    Returns:
+        frozenset of EXTERNAL and .group.* block names present in memory
+    """
+    return frozenset(
+        name
+        for name in (block.getName() for block in memory.getBlocks())
+        if name == "EXTERNAL" or name.startswith(".group")
+    )
+
+
+def should_skip_function(func, program, skip_blocks=None, memory=None):
     """
     Determine if a function should be skipped during decompilation.
 
@@ -261,11 +384,21 @@ def should_skip_function(func, program):
     Args:
         func: Ghidra Function object
         program: Ghidra Program object (currentProgram)
+        skip_blocks: Optional result of get_skip_block_names(), to avoid
+            per-function block lookups when a program has no such blocks
+        memory: Optional program.getMemory(), to avoid fetching it per call
 
     Returns:
         True if function should be skipped
     """
+    # Skip common libc/libstdc++ external function names. Checked first as
+    # it needs no further calls into Ghidra's Java API. Every pattern
+    # contains "__", "_Unwind_" or "operator ", which most names lack.
     func_name = func.getName()
+    if "__" in func_name or "_Unwind_" in func_name or "operator " in func_name:
+        for pattern in SKIP_FUNCTION_PATTERNS:
+            if pattern in func_name:
+                return True
 
     # Skip functions in EXTERNAL block (libc, libstdc++, etc.)
     if func.isExternal():
@@ -276,20 +409,19 @@ def should_skip_function(func, program):
         return True
 
     # Skip functions with addresses in EXTERNAL memory block
-    addr = func.getEntryPoint()
-    mem = program.getMemory()
-    block = mem.getBlock(addr)
+    if skip_blocks is not None and not skip_blocks:
+        return False
+    if memory is None:
+        memory = program.getMemory()
+    block = memory.getBlock(func.getEntryPoint())
     if block is not None:
         block_name = block.getName()
         # Skip EXTERNAL and .group.* sections
+        if skip_blocks is not None:
+            return block_name in skip_blocks
         if block_name == "EXTERNAL" or block_name.startswith(".group"):
             return True
 
-    # Skip common libc/libstdc++ external function names
-    for pattern in SKIP_FUNCTION_PATTERNS:
-        if pattern in func_name:
-            return True
-
     return False
 
 
@@ -316,17 +448,26 @@ def clean_decompiled_code(code):
         return code
 
     # Normalize line endings (Windows CRLF -> LF)
-    code = code.replace("\r\n", "\n").replace("\r", "\n")
+    if "\r" in code:
+        code = code.replace("\r\n", "\n").replace("\r", "\n")
 
-    lines = code.split("\n")
     cleaned_lines = []
     prev_blank = False
-    inside_function = False
     brace_depth = 0
 
-    for line in lines:
+    for line in code.split("\n"):
         stripped = line.strip()
 
+        # Handle blank lines
+        if not stripped:
+            # Inside function body: skip all blank lines for compact code
+            # Outside function: keep max 1 consecutive blank line
+            if brace_depth > 0 or prev_blank:
+                continue
+            prev_blank = True
+            cleaned_lines.append(line)
+            continue
+
         # Skip function signature comments: /* FuncName(...) */ or /* FuncName */
         # These appear at the start of functions and are redundant
         if stripped.startswith("/*") and stripped.endswith("*/"):
@@ -336,22 +477,14 @@ def clean_decompiled_code(code):
             if "(" in inner or (inner and " " not in inner and len(inner) < 100):
                 continue
 
-        # Track brace depth to know if we're inside a function body
-        brace_depth += stripped.count("{") - stripped.count("}")
-        inside_function = brace_depth > 0
-
-        # Handle blank lines
-        if not stripped:
-            # Inside function body: skip all blank lines for compact code
-            if inside_function:
-                continue
-            # Outside function: keep max 1 consecutive blank line
-            if prev_blank:
-                continue
-            prev_blank = True
-        else:
-            prev_blank = False
+        # Track brace depth to know if we're inside a function body; most
+        # lines have no braces, so only count when one is present
+        if "{" in stripped:
+            brace_depth += stripped.count("{")
+        if "}" in stripped:
+            brace_depth -= stripped.count("}")
 
+        prev_blank = False
         cleaned_lines.append(line)
 
     # Remove trailing blank lines
@@ -378,7 +511,7 @@ def get_decompiled_function_basic(decomp_ifc, func, monitor):
         Decompiled C code string or None on failure
     """
     try:
-        results = decomp_ifc.decompileFunction(func, 60, monitor)
+        results = decomp_ifc.decompileFunction(func, DECOMPILE_TIMEOUT, monitor)
         if results and results.decompileCompleted():
             code = results.getDecompiledFunction().getC()
             return clean_decompiled_code(code)
@@ -406,7 +539,7 @@ def get_decompiled_function_with_debug_info(
         Decompiled C code string with debug annotations, or None on failure
     """
     try:
-        results = decomp_ifc.decompileFunction(func, 60, monitor)
+        results = decomp_ifc.decompileFunction(func, DECOMPILE_TIMEOUT, monitor)
         if results and results.decompileCompleted():
             code = results.getDecompiledFunction().getC()
             code = clean_decompiled_code(code)
@@ -447,14 +580,8 @@ def get_decompiled_function_with_debug_info(
                                 ) + " + {} more */\n".format(len(preserved_vars) - 10)
 
                             # Insert after function signature
-                            brace_pos = code.find("{")
-                            if brace_pos > 0:
-                                code = (
-                                    code[: brace_pos + 1]
-                                    + "\n"
-                                    + var_comment
-                                    + code[brace_pos + 1 :]
-                                )
+                            if code.find("{") > 0:
+                                code = code.replace("{", "{\n" + var_comment, 1)
 
             return code
     except Exception as e:
@@ -482,16 +609,14 @@ def get_decompiled_function(
         Decompiled C code string or None on failure
     """
     try:
-        results = decomp_ifc.decompileFunction(func, 60, monitor)
+        results = decomp_ifc.decompileFunction(func, DECOMPILE_TIMEOUT, monitor)
         if results and results.decompileCompleted():
             code = results.getDecompiledFunction().getC()
             # Normalize Ghidra-specific types to standard C types
             code = normalize_code_types(code)
             # Optionally enhance with class/struct analysis
             if enhance and (class_info or struct_info):
-                code = enhance_decompiled_code(
-                    code, class_info or {}, struct_info or {}
-                )
+                code = enhance_decompiled_code(code, class_info, struct_info)
             return code
     except Exception as e:
         print("  [Error] Failed to decompile {}: {}".format(func.getName(), str(e)))
@@ -509,8 +634,8 @@ def enhance_decompiled_code(code, class_info_map, struct_info_map):
 
     Args:
         code: Decompiled C code
-        class_info_map: Dict of class name -> CppClassInfo
-        struct_info_map: Dict of struct name -> struct definition
+        class_info_map: Dict of class name -> CppClassInfo, or None
+        struct_info_map: Dict of struct name -> struct definition, or None
 
     Returns:
         Enhanced code with annotations
@@ -518,38 +643,32 @@ def enhance_decompiled_code(code, class_info_map, struct_info_map):
     if not code:
         return code
 
-    enhanced = code
-
-    # Pattern to match struct field access: *(type *)(ptr + offset)
-    # or: ptr->field_0xNN
-    field_pattern = r"(field_0x[0-9a-fA-F]+)"
-
-    # Add comments for unknown fields to help analysis
-    matches = re.findall(field_pattern, enhanced)
-    if matches:
-        # Add a hint comment at the function start if there are many unknown fields
-        unique_fields = set(matches)
-        if len(unique_fields) > 3:
-            hint = (
-                "// NOTE: {} unknown struct fields accessed "
-                "- consider defining struct type\n".format(len(unique_fields))
-            )
-            # Insert after function signature
-            brace_pos = enhanced.find("{")
-            if brace_pos > 0:
-                enhanced = (
-                    enhanced[: brace_pos + 1] + "\n" + hint + enhanced[brace_pos + 1 :]
-                )
-
-    # Pattern to match vtable calls: (*(func_ptr_type *)(*obj + offset))()
-    vtable_pattern = r"\(\*\*\(\w+\s*\*\*\)\(\*?\(?(\w+)\)?\s*\+\s*(0x[0-9a-fA-F]+)\)\)"
-
-    def vtable_replacer(match):
-        offset = match.group(2)
-        # Add annotation comment
-        return match.group(0) + " /* vtable[{}] */".format(offset)
-
-    enhanced = re.sub(vtable_pattern, vtable_replacer, enhanced)
+    # Collect unknown fields and annotate vtable calls in a single scan
+    unique_fields = set()
+    pieces = []
+    pos = 0
+    for match in FIELD_OR_VTABLE_PATTERN.finditer(code):
+        if match.group("field"):
+            unique_fields.add(match.group("field"))
+            continue
+        # A field used as the object pointer is inside the vtable call
+        if "field_0x" in match.group(0):
+            unique_fields.update(FIELD_PATTERN.findall(match.group(0)))
+        pieces.append(code[pos : match.end()])
+        pieces.append(" /* vtable[{}] */".format(match.group("offset")))
+        pos = match.end()
+    pieces.append(code[pos:])
+    enhanced = "".join(pieces)
+
+    # Add a hint comment at the function start if there are many unknown fields
+    if len(unique_fields) > 3:
+        hint = (
+            "// NOTE: {} unknown struct fields accessed "
+            "- consider defining struct type\n".format(len(unique_fields))
+        )
+        # Insert after function signature
+        if enhanced.find("{") > 0:
+            enhanced = enhanced.replace("{", "{\n" + hint, 1)
 
     return enhanced
 
@@ -569,22 +688,26 @@ def write_file_header(f, module_name, func_count, program_name=None):
         func_count: Number of functions in the module
         program_name: Optional source program name
     """
-    f.write("/**\n")
-    f.write(" * Module: {}\n".format(module_name))
+    parts = []
+    parts.append("/**\n")
+    parts.append(" * Module: {}\n".format(module_name))
     if program_name:
-        f.write(" * Source: {}\n".format(program_name))
-    f.write(" * Functions: {}\n".format(func_count))
-    f.write(" *\n")
-    f.write(" * Auto-generated by LibSurgeon (Ghidra-based decompiler)\n")
-    f.write(" *\n")
-    f.write(
+        parts.append(" * Source: {}\n".format(program_name))
+    parts.append(" * Functions: {}\n".format(func_count))
+    parts.append(" *\n")
+    parts.append(" * Auto-generated by LibSurgeon (Ghidra-based decompiler)\n")
+    parts.append(" *\n")
+    parts.append(
         " * WARNING: This is automatically generated code from reverse engineering.\n"
     )
-    f.write(" * It may not compile directly and is intended for analysis purposes.\n")
-    f.write(" */\n\n")
-    f.write("#include <stdint.h>\n")
-    f.write("#include <stdbool.h>\n")
-    f.write("#include <stddef.h>\n\n")
+    parts.append(
+        " * It may not compile directly and is intended for analysis purposes.\n"
+    )
+    parts.append(" */\n\n")
+    parts.append("#include <stdint.h>\n")
+    parts.append("#include <stdbool.h>\n")
+    parts.append("#include <stddef.h>\n\n")
+    f.write("".join(parts))
 
 
 # ============================================================
@@ -592,45 +715,38 @@ def write_file_header(f, module_name, func_count, program_name=None):
 # ============================================================
 
 
-def extract_function_signature(decompiled_code):
+def extract_function_signature(decompiled_code, already_normalized=False):
     """
     Extract function signature from decompiled code.
     Returns the normalized function signature string or None if extraction fails.
+
+    Pass already_normalized=True for code that went through
+    normalize_code_types() to skip normalizing the signature again.
     """
     if not decompiled_code:
         return None
 
-    # Find the first function definition (before the opening brace)
-    lines = decompiled_code.strip().split("\n")
-    signature_lines = []
-
-    for line in lines:
-        if "{" in line:
-            # Include part before the brace
-            signature_lines.append(line.split("{")[0].strip())
-            break
-        signature_lines.append(line.strip())
-
-    if not signature_lines:
-        return None
-
-    signature = " ".join(signature_lines).strip()
-
-    # Clean up the signature
-    signature = re.sub(r"\s+", " ", signature)
+    # The signature is everything before the first opening brace
+    head = decompiled_code.partition("{")[0]
+    signature = " ".join(head.split())
 
     # Skip if it looks like a variable declaration or empty
     if not signature or signature.endswith(";"):
         return None
 
     # Normalize types in the signature
-    signature = normalize_code_types(signature)
+    if not already_normalized:
+        signature = normalize_code_types(signature)
 
     return signature
 
 
 def generate_header_file(
-    output_dir, module_name, func_signatures, source_type="decompilation"
+    output_dir,
+    module_name,
+    func_signatures,
+    source_type="decompilation",
+    safe_name=None,
 ):
     """
     Generate a header file for a module with function declarations.
@@ -640,53 +756,58 @@ def generate_header_file(
         module_name: Name of the module
         func_signatures: List of (func_name, signature) tuples
         source_type: Description of the source (e.g., "ELF decompilation", "library decompilation")
+        safe_name: Optional precomputed sanitize_filename(module_name)
 
     Returns:
         Path to the generated header file
     """
-    safe_name = sanitize_filename(module_name)
+    if safe_name is None:
+        safe_name = sanitize_filename(module_name)
     header_file = os.path.join(output_dir, "{}.h".format(safe_name))
 
     guard_name = "_{}_H_".format(safe_name.upper())
 
+    parts = []
+    parts.append("/**\n")
+    parts.append(" * Header: {}.h\n".format(safe_name))
+    parts.append(" * Module: {}\n".format(module_name))
+    parts.append(" * Functions: {}\n".format(len(func_signatures)))
+    parts.append(" * \n")
+    parts.append(" * Auto-generated by LibSurgeon from {}\n".format(source_type))
+    parts.append(" */\n\n")
+
+    parts.append("#ifndef {}\n".format(guard_name))
+    parts.append("#define {}\n\n".format(guard_name))
+
+    parts.append("#include <stdint.h>\n")
+    parts.append("#include <stdbool.h>\n")
+    parts.append("#include <stddef.h>\n")
+    parts.append('#include "_types.h"\n\n')
+
+    parts.append("#ifdef __cplusplus\n")
+    parts.append('extern "C" {\n')
+    parts.append("#endif\n\n")
+
+    # Write function declarations
+    parts.append("/* Function Declarations */\n\n")
+    for func_name, signature in sorted(func_signatures, key=itemgetter(0)):
+        if signature:
+            parts.append("/* {} */\n".format(func_name))
+            parts.append("{};\n\n".format(signature))
+
+    parts.append("#ifdef __cplusplus\n")
+    parts.append("}\n")
+    parts.append("#endif\n\n")
+
+    parts.append("#endif /* {} */\n".format(guard_name))
+
     with open(header_file, "w") as f:
-        f.write("/**\n")
-        f.write(" * Header: {}.h\n".format(safe_name))
-        f.write(" * Module: {}\n".format(module_name))
-        f.write(" * Functions: {}\n".format(len(func_signatures)))
-        f.write(" * \n")
-        f.write(" * Auto-generated by LibSurgeon from {}\n".format(source_type))
-        f.write(" */\n\n")
-
-        f.write("#ifndef {}\n".format(guard_name))
-        f.write("#define {}\n\n".format(guard_name))
-
-        f.write("#include <stdint.h>\n")
-        f.write("#include <stdbool.h>\n")
-        f.write("#include <stddef.h>\n")
-        f.write('#include "_types.h"\n\n')
-
-        f.write("#ifdef __cplusplus\n")
-        f.write('extern "C" {\n')
-        f.write("#endif\n\n")
-
-        # Write function declarations
-        f.write("/* Function Declarations */\n\n")
-        for func_name, signature in sorted(func_signatures, key=lambda x: x[0]):
-            if signature:
-                f.write("/* {} */\n".format(func_name))
-                f.write("{};\n\n".format(signature))
-
-        f.write("#ifdef __cplusplus\n")
-        f.write("}\n")
-        f.write("#endif\n\n")
-
-        f.write("#endif /* {} */\n".format(guard_name))
+        f.write("".join(parts))
 
     return header_file
 
 
-def generate_master_header(output_dir, module_names, program_name):
+def generate_master_header(output_dir, module_names, program_name, safe_names=None):
     """
     Generate a master header file that includes all module headers.
 
@@ -694,32 +815,43 @@ def generate_master_header(output_dir, module_names, program_name):
         output_dir: Directory to write the header file
         module_names: Iterable of module names
         program_name: Name of the source program
+        safe_names: Optional dict of module name -> sanitized file name
 
     Returns:
         Path to the generated master header file
     """
     header_file = os.path.join(output_dir, "_all_headers.h")
 
-    with open(header_file, "w") as f:
-        f.write("/**\n")
-        f.write(" * Master Header File\n")
-        f.write(" * Source: {}\n".format(program_name))
-        f.write(" * Modules: {}\n".format(len(list(module_names))))
-        f.write(" * \n")
-        f.write(" * Auto-generated by LibSurgeon\n")
-        f.write(" * Include this file to get all function declarations.\n")
-        f.write(" */\n\n")
-
-        f.write("#ifndef _ALL_HEADERS_H_\n")
-        f.write("#define _ALL_HEADERS_H_\n\n")
-
-        f.write('#include "_types.h"\n\n')
-
-        for module_name in sorted(module_names):
+    # Sort once; module_names may be a one-shot iterator
+    modules = sorted(module_names)
+
+    parts = []
+    parts.append("/**\n")
+    parts.append(" * Master Header File\n")
+    parts.append(" * Source: {}\n".format(program_name))
+    parts.append(" * Modules: {}\n".format(len(modules)))
+    parts.append(" * \n")
+    parts.append(" * Auto-generated by LibSurgeon\n")
+    parts.append(" * Include this file to get all function declarations.\n")
+    parts.append(" */\n\n")
+
+    parts.append("#ifndef _ALL_HEADERS_H_\n")
+    parts.append("#define _ALL_HEADERS_H_\n\n")
+
+    parts.append('#include "_types.h"\n\n')
+
+    if safe_names is None:
+        safe_names = {}
+    for module_name in modules:
+        safe_name = safe_names.get(module_name)
+        if safe_name is None:
             safe_name = sanitize_filename(module_name)
-            f.write('#include "{}.h"\n'.format(safe_name))
+        parts.append('#include "{}.h"\n'.format(safe_name))
 
-        f.write("\n#endif /* _ALL_HEADERS_H_ */\n")
+    parts.append("\n#endif /* _ALL_HEADERS_H_ */\n")
+
+    with open(header_file, "w") as f:
+        f.write("".join(parts))
 
     return header_file
 
@@ -736,24 +868,27 @@ def generate_types_header(output_dir):
     """
     types_file = os.path.join(output_dir, "_types.h")
 
-    with open(types_file, "w") as f:
-        f.write("/**\n")
-        f.write(" * Type Definitions for Decompiled Code\n")
-        f.write(" * \n")
-        f.write(" * This file contains typedef mappings for Ghidra-generated types.\n")
-        f.write(" * Auto-generated by LibSurgeon\n")
-        f.write(" */\n\n")
+    parts = []
+    parts.append("/**\n")
+    parts.append(" * Type Definitions for Decompiled Code\n")
+    parts.append(" * \n")
+    parts.append(" * This file contains typedef mappings for Ghidra-generated types.\n")
+    parts.append(" * Auto-generated by LibSurgeon\n")
+    parts.append(" */\n\n")
 
-        f.write("#ifndef _LIBSURGEON_TYPES_H_\n")
-        f.write("#define _LIBSURGEON_TYPES_H_\n\n")
+    parts.append("#ifndef _LIBSURGEON_TYPES_H_\n")
+    parts.append("#define _LIBSURGEON_TYPES_H_\n\n")
 
-        f.write("#include <stdint.h>\n")
-        f.write("#include <stdbool.h>\n\n")
+    parts.append("#include <stdint.h>\n")
+    parts.append("#include <stdbool.h>\n\n")
 
-        f.write("/* Unknown type definitions (signedness uncertain) */\n")
-        f.write(UNKNOWN_TYPE_DEFS)
-        f.write("\n")
+    parts.append("/* Unknown type definitions (signedness uncertain) */\n")
+    parts.append(UNKNOWN_TYPE_DEFS)
+    parts.append("\n")
 
-        f.write("#endif /* _LIBSURGEON_TYPES_H_ */\n")
+    parts.append("#endif /* _LIBSURGEON_TYPES_H_ */\n")
+
+    with open(types_file, "w") as f:
+        f.write("".join(parts))
 
     return types_file
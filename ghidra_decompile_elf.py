@@ -21,10 +21,12 @@ Module Grouping Strategies:
 For library (.a/.o) file processing, use ghidra_decompile_lib.py instead.
 """
 
+import heapq
 import os
 import re
 import sys
 from collections import OrderedDict, defaultdict
+from operator import itemgetter
 
 # Add the script's directory to Python path for importing ghidra_common
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -32,7 +34,9 @@ if script_dir not in sys.path:
     sys.path.insert(0, script_dir)
 
 # Ghidra Python scripts use Jython with Ghidra's API
+import jarray
 from ghidra.app.decompiler import DecompInterface
+from ghidra.program.model.address import AddressOutOfBoundsException
 from ghidra.program.model.data import (
     ArrayDataType,
     EnumDataType,
@@ -41,13 +45,17 @@ from ghidra.program.model.data import (
     StructureDataType,
     TypedefDataType,
 )
+from ghidra.program.model.mem import MemoryAccessException
 from ghidra.program.model.symbol import SourceType
 from ghidra.util.task import ConsoleTaskMonitor
 from java.io import File
+from java.nio import BufferUnderflowException, ByteBuffer, ByteOrder
 
 # Import shared utilities from ghidra_common
 from ghidra_common import (
+    DECOMPILE_TIMEOUT,
     GHIDRA_TYPE_MAP,
+    OUTPUT_BUFFER_SIZE,
     UNKNOWN_TYPE_DEFS,
     demangle_cpp_name,
     enhance_decompiled_code,
@@ -66,6 +74,25 @@ from ghidra_common import (
 # C++ Class and Virtual Function Analysis
 # ============================================================
 
+# Symbol names that look like vtables, matched from the start of the name
+VTABLE_SYMBOL_PATTERN = re.compile(
+    r"_ZTV"  # Itanium ABI: _ZTV<class>
+    r"|vtable\s+for\s+"  # Demangled vtable
+    r"|__vt_"  # Some compilers
+    r"|_vtbl$",  # ARM/RVCT pattern
+    re.IGNORECASE,
+)
+
+# Ghidra symbol search strings covering every VTABLE_SYMBOL_PATTERN
+# alternative, so the symbol table is filtered on the Java side
+VTABLE_SYMBOL_GLOBS = ("_ZTV*", "vtable*", "__vt_*", "_vtbl")
+
+# Safety limit on the number of pointers read from one vtable
+VTABLE_MAX_ENTRIES = 100
+
+# Memory blocks whose data references to a function suggest a vtable slot
+VTABLE_BLOCK_NAMES = frozenset([".rodata", ".data", ".data.rel.ro"])
+
 
 class CppClassInfo:
     """Information about a C++ class extracted from analysis"""
@@ -74,13 +101,13 @@ class CppClassInfo:
         self.name = name
         self.methods = []  # [(func_name, display_name, is_virtual, vtable_index)]
         self.vtable_addr = None
-        self.vtable_funcs = []  # [(index, func_addr, func_name)]
+        self.vtable_funcs = []  # [(index, func_addr, function)]
         self.struct_type = None  # Associated Ghidra struct type
         self.parent_class = None
         self.size = 0
 
 
-def is_virtual_method(func, program):
+def is_virtual_method(func, program, ref_manager=None, memory=None):
     """
     Check if a function is likely a virtual method.
 
@@ -88,111 +115,120 @@ def is_virtual_method(func, program):
     1. Referenced in a vtable (data section with function pointers)
     2. Has __thiscall convention with 'this' as first param
     3. Name matches virtual method patterns
-    """
-    func_name = func.getName()
 
+    ref_manager and memory may be passed in to avoid fetching them from
+    the program on every call.
+    """
     # Check calling convention
     calling_conv = func.getCallingConventionName()
     if calling_conv and "thiscall" in calling_conv.lower():
         return True
 
     # Check if function is referenced from data section (potential vtable)
-    refs = program.getReferenceManager().getReferencesTo(func.getEntryPoint())
-    for ref in refs:
+    if ref_manager is None:
+        ref_manager = program.getReferenceManager()
+    if memory is None:
+        memory = program.getMemory()
+    for ref in ref_manager.getReferencesTo(func.getEntryPoint()):
         if ref.getReferenceType().isData():
-            from_addr = ref.getFromAddress()
             # Check if reference is from a potential vtable location
-            mem = program.getMemory()
-            block = mem.getBlock(from_addr)
-            if block and (block.getName() in [".rodata", ".data", ".data.rel.ro"]):
+            block = memory.getBlock(ref.getFromAddress())
+            if block and block.getName() in VTABLE_BLOCK_NAMES:
                 return True
 
     return False
 
 
+def iter_vtable_symbols(symbol_table):
+    """
+    Yield the symbols that may name a vtable.
+
+    The searches match case-insensitively and are disjoint, so each
+    symbol is yielded at most once. Callers still check the exact
+    VTABLE_SYMBOL_PATTERN.
+    """
+    for search in VTABLE_SYMBOL_GLOBS:
+        for symbol in symbol_table.getSymbolIterator(search, False):
+            yield symbol
+
+
 def analyze_vtables(program, monitor):
     """
     Analyze virtual function tables in the program.
 
-    Returns dict: vtable_addr -> [(index, func_addr, func_name)]
+    Returns dict: vtable_addr -> {"class_name": name or None,
+                                  "entries": [(index, func_addr, function)]}
+    Function names are left to the consumer, since most vtables are never
+    written out.
     """
     vtables = {}
     symbol_table = program.getSymbolTable()
     mem = program.getMemory()
     listing = program.getListing()
 
-    # Look for symbols that match vtable patterns
-    vtable_patterns = [
-        r"^_ZTV",  # Itanium ABI: _ZTV<class>
-        r"^vtable\s+for\s+",  # Demangled vtable
-        r"^__vt_",  # Some compilers
-        r"_vtbl$",  # ARM/RVCT pattern
-    ]
+    # Vtable candidates are read up to VTABLE_MAX_ENTRIES pointers at a time
+    ptr_size = program.getDefaultPointerSize()
+    table_buf = jarray.zeros(VTABLE_MAX_ENTRIES * ptr_size, "b")
+    byte_order = ByteOrder.BIG_ENDIAN if mem.isBigEndian() else ByteOrder.LITTLE_ENDIAN
+    addr_space = program.getAddressFactory().getDefaultAddressSpace()
+
+    # Slot value -> (address, function or None); vtables of related classes
+    # share inherited methods and RTTI slots
+    func_at_cache = {}
 
-    for symbol in symbol_table.getAllSymbols(True):
+    for symbol in iter_vtable_symbols(symbol_table):
         if monitor.isCancelled():
             break
 
         sym_name = symbol.getName()
+
+        # Check if this looks like a vtable. Itanium _ZTV names, the common
+        # case, need no regex.
+        is_itanium = sym_name.startswith("_ZTV")
+        if not is_itanium and not VTABLE_SYMBOL_PATTERN.match(sym_name):
+            continue
+
         sym_addr = symbol.getAddress()
 
-        # Check if this looks like a vtable
-        is_vtable = False
+        # Try to extract class name
         class_name = None
+        if is_itanium:
+            # Demangle
+            demangled = demangle_cpp_name(sym_name, program)
+            if "vtable for " in demangled:
+                class_name = demangled.replace("vtable for ", "").strip()
+            else:
+                class_name = sym_name[4:]  # Remove _ZTV prefix
 
-        for pattern in vtable_patterns:
-            if re.match(pattern, sym_name, re.IGNORECASE):
-                is_vtable = True
-                # Try to extract class name
-                if sym_name.startswith("_ZTV"):
-                    # Demangle
-                    demangled = demangle_cpp_name(sym_name, program)
-                    if "vtable for " in demangled:
-                        class_name = demangled.replace("vtable for ", "").strip()
-                    else:
-                        class_name = sym_name[4:]  # Remove _ZTV prefix
-                break
-
-        if not is_vtable:
+        # Read the candidate table (array of function pointers) in one call
+        try:
+            read = mem.getBytes(sym_addr, table_buf)
+        except MemoryAccessException:
             continue
-
-        # Parse vtable entries (array of function pointers)
-        vtable_entries = []
-        ptr_size = program.getDefaultPointerSize()
-        current_addr = sym_addr
-        index = 0
+        table = ByteBuffer.wrap(table_buf, 0, read).order(byte_order)
+        read_pointer = table.getInt if ptr_size == 4 else table.getLong
 
         # Skip RTTI pointer and offset-to-top (first 2 entries for Itanium ABI)
         # This is platform-specific, so we try to detect valid function pointers
-        max_entries = 100  # Safety limit
-
-        while index < max_entries:
+        vtable_entries = []
+        for index in range(read // ptr_size):
             try:
-                # Read pointer value
-                if ptr_size == 4:
-                    ptr_value = mem.getInt(current_addr)
-                else:
-                    ptr_value = mem.getLong(current_addr)
+                # Decode pointer value
+                ptr_value = read_pointer()
 
                 # Check if this points to a function
-                ptr_addr = (
-                    program.getAddressFactory()
-                    .getDefaultAddressSpace()
-                    .getAddress(ptr_value)
-                )
-                func_at = listing.getFunctionAt(ptr_addr)
-
-                if func_at:
-                    vtable_entries.append((index, ptr_addr, func_at.getName()))
-                    index += 1
-                    current_addr = current_addr.add(ptr_size)
-                elif index > 2:  # Allow first 2 entries to be non-functions (RTTI)
-                    break
-                else:
-                    index += 1
-                    current_addr = current_addr.add(ptr_size)
+                target = func_at_cache.get(ptr_value)
+                if target is None:
+                    ptr_addr = addr_space.getAddress(ptr_value)
+                    target = (ptr_addr, listing.getFunctionAt(ptr_addr))
+                    func_at_cache[ptr_value] = target
+                ptr_addr, func_at = target
+            except (AddressOutOfBoundsException, BufferUnderflowException):
+                break
 
-            except:
+            if func_at:
+                vtable_entries.append((index, ptr_addr, func_at))
+            elif index > 2:  # Allow first 2 entries to be non-functions (RTTI)
                 break
 
         if vtable_entries:
@@ -209,6 +245,21 @@ def analyze_cpp_classes(program, module_functions, vtables, monitor):
     """
     classes = {}
 
+    # Index vtable slots by class name and function entry offset. When a
+    # function sits in several vtables of one class, the last vtable wins
+    # and its first slot is used.
+    vtable_slots = defaultdict(dict)
+    for vt_info in vtables.values():
+        if not vt_info["class_name"]:
+            continue
+        slots = {}
+        for idx, func_addr, _ in reversed(vt_info["entries"]):
+            slots[func_addr.getOffset()] = idx
+        vtable_slots[vt_info["class_name"]].update(slots)
+
+    ref_manager = program.getReferenceManager()
+    memory = program.getMemory()
+
     # Collect methods from function signatures
     for module_name, funcs in module_functions.items():
         for func, display_name, mangled_name in funcs:
@@ -222,20 +273,20 @@ def analyze_cpp_classes(program, module_functions, vtables, monitor):
             if class_name not in classes:
                 classes[class_name] = CppClassInfo(class_name)
 
-            # Check if virtual
-            is_virtual = is_virtual_method(func, program)
-            vtable_index = -1
-
-            # Find in vtables
-            for vt_addr, vt_info in vtables.items():
-                if vt_info["class_name"] == class_name:
-                    for idx, func_addr, fname in vt_info["entries"]:
-                        if func.getEntryPoint().equals(func_addr):
-                            is_virtual = True
-                            vtable_index = idx
-                            break
+            # Find in vtables; otherwise fall back to the heuristics. The
+            # entry offset is only fetched for classes that have a vtable.
+            class_slots = vtable_slots.get(class_name)
+            slot = None
+            if class_slots:
+                slot = class_slots.get(func.getEntryPoint().getOffset())
+            if slot is not None:
+                is_virtual = True
+                vtable_index = slot
+            else:
+                is_virtual = is_virtual_method(func, program, ref_manager, memory)
+                vtable_index = -1
 
-            method_name = display_name.split("::")[-1].split("(")[0].strip()
+            method_name = display_name.split("::")[-1].partition("(")[0].strip()
             classes[class_name].methods.append(
                 (func.getName(), method_name, is_virtual, vtable_index)
             )
@@ -256,73 +307,82 @@ def generate_class_header(output_dir, classes, program_name):
         return None
 
     header_file = os.path.join(output_dir, "_classes.h")
+    separator = "/* " + "=" * 56 + " */\n"
+    # Derived class vtables repeat inherited slots; name each function once
+    vtable_func_names = {}
+
+    parts = []
+    parts.append("/**\n")
+    parts.append(" * C++ Class Analysis\n")
+    parts.append(" * Source: {}\n".format(program_name))
+    parts.append(" * Classes found: {}\n".format(len(classes)))
+    parts.append(" *\n")
+    parts.append(" * Auto-generated by LibSurgeon\n")
+    parts.append(" * NOTE: This is analysis output, not compilable code\n")
+    parts.append(" */\n\n")
+
+    parts.append("#ifndef _CLASSES_H_\n")
+    parts.append("#define _CLASSES_H_\n\n")
+
+    parts.append('#include "_types.h"\n\n')
+
+    # Write class declarations
+    for class_name in sorted(classes.keys()):
+        cls = classes[class_name]
+        parts.append(separator)
+        parts.append("/* Class: {} */\n".format(class_name))
+        parts.append(separator)
+        parts.append("\n")
+
+        # Virtual table info
+        if cls.vtable_addr:
+            parts.append(
+                "/* VTable at: 0x{:08x} */\n".format(cls.vtable_addr.getOffset())
+            )
+            parts.append("/* Virtual methods: {} */\n".format(len(cls.vtable_funcs)))
 
-    with open(header_file, "w") as f:
-        f.write("/**\n")
-        f.write(" * C++ Class Analysis\n")
-        f.write(" * Source: {}\n".format(program_name))
-        f.write(" * Classes found: {}\n".format(len(classes)))
-        f.write(" *\n")
-        f.write(" * Auto-generated by LibSurgeon\n")
-        f.write(" * NOTE: This is analysis output, not compilable code\n")
-        f.write(" */\n\n")
-
-        f.write("#ifndef _CLASSES_H_\n")
-        f.write("#define _CLASSES_H_\n\n")
-
-        f.write('#include "_types.h"\n\n')
-
-        # Write class declarations
-        for class_name in sorted(classes.keys()):
-            cls = classes[class_name]
-            f.write("/* " + "=" * 56 + " */\n")
-            f.write("/* Class: {} */\n".format(class_name))
-            f.write("/* " + "=" * 56 + " */\n\n")
-
-            # Virtual table info
-            if cls.vtable_addr:
-                f.write(
-                    "/* VTable at: 0x{:08x} */\n".format(cls.vtable_addr.getOffset())
-                )
-                f.write("/* Virtual methods: {} */\n".format(len(cls.vtable_funcs)))
-
-                if cls.vtable_funcs:
-                    f.write("/*\n")
-                    f.write(" * Virtual Function Table:\n")
-                    for idx, func_addr, func_name in cls.vtable_funcs:
-                        f.write(
-                            " *   [{}] {} @ 0x{:08x}\n".format(
-                                idx, func_name, func_addr.getOffset()
-                            )
-                        )
-                    f.write(" */\n")
-                f.write("\n")
-
-            # Class declaration (forward)
-            safe_name = class_name.replace("::", "_")
-            f.write("typedef struct {} {};\n".format(safe_name, safe_name))
-            f.write("struct {} {{\n".format(safe_name))
-
-            # Add vtable pointer if class has virtual methods
             if cls.vtable_funcs:
-                f.write("    void **_vptr;  /* Virtual function table pointer */\n")
-
-            f.write("    /* TODO: Add member fields based on analysis */\n")
-            f.write("}};\n\n")
-
-            # Method declarations
-            f.write("/* Methods ({}) */\n".format(len(cls.methods)))
-            for mangled, method_name, is_virtual, vt_idx in sorted(
-                cls.methods, key=lambda x: x[1]
-            ):
-                virtual_mark = (
-                    "[virtual:{}] ".format(vt_idx) if is_virtual and vt_idx >= 0 else ""
-                )
-                virtual_kw = "virtual " if is_virtual else ""
-                f.write("/* {}{}{} */\n".format(virtual_mark, virtual_kw, method_name))
-            f.write("\n")
+                parts.append("/*\n")
+                parts.append(" * Virtual Function Table:\n")
+                for idx, func_addr, vfunc in cls.vtable_funcs:
+                    offset = func_addr.getOffset()
+                    func_name = vtable_func_names.get(offset)
+                    if func_name is None:
+                        func_name = vtable_func_names[offset] = vfunc.getName()
+                    parts.append(
+                        " *   [{}] {} @ 0x{:08x}\n".format(idx, func_name, offset)
+                    )
+                parts.append(" */\n")
+            parts.append("\n")
+
+        # Class declaration (forward)
+        safe_name = class_name.replace("::", "_")
+        parts.append("typedef struct {} {};\n".format(safe_name, safe_name))
+        parts.append("struct {} {{\n".format(safe_name))
+
+        # Add vtable pointer if class has virtual methods
+        if cls.vtable_funcs:
+            parts.append("    void **_vptr;  /* Virtual function table pointer */\n")
+
+        parts.append("    /* TODO: Add member fields based on analysis */\n")
+        parts.append("};\n\n")
+
+        # Method declarations
+        parts.append("/* Methods ({}) */\n".format(len(cls.methods)))
+        for mangled, method_name, is_virtual, vt_idx in sorted(
+            cls.methods, key=itemgetter(1)
+        ):
+            virtual_mark = (
+                "[virtual:{}] ".format(vt_idx) if is_virtual and vt_idx >= 0 else ""
+            )
+            virtual_kw = "virtual " if is_virtual else ""
+            parts.append("/* {}{}{} */\n".format(virtual_mark, virtual_kw, method_name))
+        parts.append("\n")
+
+    parts.append("#endif /* _CLASSES_H_ */\n")
 
-        f.write("#endif /* _CLASSES_H_ */\n")
+    with open(header_file, "w") as f:
+        f.write("".join(parts))
 
     return header_file
 
@@ -336,13 +396,13 @@ def get_decompiled_function_elf(
     ELF-specific version with class/struct enhancement.
     """
     try:
-        results = decomp_ifc.decompileFunction(func, 60, monitor)
+        results = decomp_ifc.decompileFunction(func, DECOMPILE_TIMEOUT, monitor)
         if results and results.decompileCompleted():
             code = results.getDecompiledFunction().getC()
             # Normalize Ghidra-specific types to standard C types
             code = normalize_code_types(code)
             # Enhance with class/struct analysis
-            code = enhance_decompiled_code(code, class_info or {}, struct_info or {})
+            code = enhance_decompiled_code(code, class_info, struct_info)
             return code
     except Exception as e:
         print("  [Error] Failed to decompile {}: {}".format(func.getName(), str(e)))
@@ -353,6 +413,28 @@ def get_decompiled_function_elf(
 # Module Grouping Strategies
 # ============================================================
 
+# Ghidra's placeholder names for functions and data without a symbol
+GENERATED_NAME_PREFIXES = ("FUN_", "DAT_")
+
+# Name patterns used by extract_prefix, compiled once for all functions
+CLASS_LIKE_PATTERN = re.compile(r"^[A-Z][a-zA-Z0-9]+$")
+CAMEL_WORD_PATTERN = re.compile(r"^([A-Z][a-z]+)")
+# Name prefix candidates in order of preference; the first that applies wins
+NAME_PREFIX_PATTERN = re.compile(
+    r"(?P<camel_pair>[A-Z][a-z]+[A-Z][a-z]*)"  # CoreViewDraw -> CoreView
+    r"|(?P<camel_word>[A-Z][a-z]+)"  # First CamelCase word
+    r"|(?P<lower_underscore>[a-z][a-z0-9]*_[a-z0-9]+)"  # c-style: xx_init
+    r"|(?P<lower_word>[a-z]+)"  # Just first lowercase word
+    r"|(?P<caps>[A-Z]+)_"  # All caps prefix (HAL_Init -> HAL)
+)
+
+# First two CamelCase words (or lowercase runs, or digit runs) of a name,
+# skipping other characters; the rest of the name is never scanned
+CAMEL_LEADING_WORDS_PATTERN = re.compile(
+    r"[^A-Za-z0-9]*([A-Z][a-z]*|[a-z]+|[0-9]+)"
+    r"(?:[^A-Za-z0-9]*([A-Z][a-z]*|[a-z]+|[0-9]+))?"
+)
+
 
 def extract_prefix(func_name, min_prefix_len=2, max_prefix_len=30):
     """
@@ -367,61 +449,45 @@ def extract_prefix(func_name, min_prefix_len=2, max_prefix_len=30):
         CoreView__ReInit -> CoreView
     """
     # Skip auto-generated names
-    if func_name.startswith("FUN_") or func_name.startswith("DAT_"):
+    if func_name.startswith(GENERATED_NAME_PREFIXES):
         return "_generated"
 
     # Handle C-style underscore names with double underscore as separator
     # e.g., CoreView__ReInit -> CoreView
-    if "__" in func_name:
-        parts = func_name.split("__")
-        if len(parts) >= 1 and len(parts[0]) >= min_prefix_len:
-            return parts[0]
+    sep = func_name.find("__")
+    if sep != -1 and sep >= min_prefix_len:
+        return func_name[:sep]
 
     # Handle single underscore as method separator
     # e.g., ApplicationApplication_goHome -> ApplicationApplication
-    if "_" in func_name and not func_name.startswith("_"):
-        parts = func_name.split("_")
-        if len(parts) >= 2:
-            # Check if first part looks like a class/module name (CamelCase or all caps)
-            first_part = parts[0]
-            if len(first_part) >= min_prefix_len:
-                # If it's CamelCase or reasonable length, use it
-                if re.match(r"^[A-Z][a-zA-Z0-9]+$", first_part) or len(first_part) >= 4:
-                    return first_part
-            # Try first two parts for compound names
-            if len(parts) >= 2:
-                compound = parts[0] + parts[1]
-                if len(compound) <= max_prefix_len:
-                    return compound
-
-    # Handle pure CamelCase names
-    # Find the first "word boundary" after initial capitals
-    # xxBmpInit -> xxBmp, CoreView -> Core
-    match = re.match(r"^([A-Z][a-z]+[A-Z][a-z]*)", func_name)
+    sep = func_name.find("_")
+    if sep > 0:
+        # Check if first part looks like a class/module name (CamelCase or all caps)
+        first_part = func_name[:sep]
+        if sep >= min_prefix_len:
+            # If it's CamelCase or reasonable length, use it
+            if CLASS_LIKE_PATTERN.match(first_part) or sep >= 4:
+                return first_part
+        # Try first two parts for compound names
+        end = func_name.find("_", sep + 1)
+        if end == -1:
+            end = len(func_name)
+        compound = first_part + func_name[sep + 1 : end]
+        if len(compound) <= max_prefix_len:
+            return compound
+
+    # Handle pure CamelCase, c-style and all caps names in one match
+    match = NAME_PREFIX_PATTERN.match(func_name)
     if match:
-        prefix = match.group(1)
-        if min_prefix_len <= len(prefix) <= max_prefix_len:
+        kind = match.lastgroup
+        prefix = match.group(kind)
+        if kind == "lower_underscore":
+            return prefix
+        if kind == "camel_pair" and len(prefix) > max_prefix_len:
+            # Too long for a module name; use the first CamelCase word
+            prefix = CAMEL_WORD_PATTERN.match(func_name).group(1)
+        if len(prefix) >= min_prefix_len:
             return prefix
-
-    # Simpler pattern: First CamelCase word
-    match = re.match(r"^([A-Z][a-z]+)", func_name)
-    if match and len(match.group(1)) >= min_prefix_len:
-        return match.group(1)
-
-    # Lowercase prefix (c-style: xx_init)
-    match = re.match(r"^([a-z][a-z0-9]*_[a-z0-9]+)", func_name)
-    if match:
-        return match.group(1)
-
-    # Just first lowercase word
-    match = re.match(r"^([a-z]+)", func_name)
-    if match and len(match.group(1)) >= min_prefix_len:
-        return match.group(1)
-
-    # All caps prefix (HAL_Init -> HAL)
-    match = re.match(r"^([A-Z]+)_", func_name)
-    if match and len(match.group(1)) >= min_prefix_len:
-        return match.group(1)
 
     return "_misc"
 
@@ -431,7 +497,7 @@ def get_module_name_by_alpha(func_name, display_name):
     name_to_check = display_name if display_name else func_name
 
     # Skip auto-generated names
-    if name_to_check.startswith("FUN_") or name_to_check.startswith("DAT_"):
+    if name_to_check.startswith(GENERATED_NAME_PREFIXES):
         return "_generated"
 
     first_char = name_to_check[0].upper() if name_to_check else "_"
@@ -445,20 +511,19 @@ def get_module_name_by_camelcase(func_name, display_name):
     name_to_check = display_name if display_name else func_name
 
     # Skip auto-generated names
-    if name_to_check.startswith("FUN_") or name_to_check.startswith("DAT_"):
+    if name_to_check.startswith(GENERATED_NAME_PREFIXES):
         return "_generated"
 
     # Extract CamelCase words
     if "_" in name_to_check:
         words = name_to_check.split("_")
-    else:
-        words = re.findall(r"[A-Z][a-z]*|[a-z]+|[0-9]+", name_to_check)
-
-    if len(words) >= 2:
         return words[0] + words[1]
-    elif len(words) == 1:
-        return words[0]
-    return "_misc"
+
+    match = CAMEL_LEADING_WORDS_PATTERN.match(name_to_check)
+    if not match:
+        return "_misc"
+    first, second = match.groups()
+    return first + second if second else first
 
 
 def get_module_name(func_name, display_name, strategy="prefix"):
@@ -477,26 +542,37 @@ def get_module_name(func_name, display_name, strategy="prefix"):
         return extract_prefix(name_to_check)
 
 
+# Separator line around each function's comment block in source files
+FUNCTION_BANNER = "// " + "=" * 60 + "\n"
+
+# Emit a [PROGRESS] line every N functions; libsurgeon.py only redraws its
+# progress bar when the count is a multiple of 50, so keep these in step.
+# Nothing is printed for the functions in between.
+PROGRESS_INTERVAL = 50
+
+
 def write_file_header(f, module_name, func_count):
     """Write file header for a module"""
-    f.write("/**\n")
-    f.write(" * Module: {}\n".format(module_name))
-    f.write(" * Functions: {}\n".format(func_count))
-    f.write(" * \n")
-    f.write(" * Generated by LibSurgeon (Ghidra-based decompiler)\n")
-    f.write(" * \n")
-    f.write(
+    parts = []
+    parts.append("/**\n")
+    parts.append(" * Module: {}\n".format(module_name))
+    parts.append(" * Functions: {}\n".format(func_count))
+    parts.append(" * \n")
+    parts.append(" * Generated by LibSurgeon (Ghidra-based decompiler)\n")
+    parts.append(" * \n")
+    parts.append(
         " * WARNING: This is automatically generated code from reverse engineering.\n"
     )
-    f.write(
+    parts.append(
         " * It may not compile directly and is intended for educational purposes only.\n"
     )
-    f.write(" */\n\n")
+    parts.append(" */\n\n")
 
-    f.write("#include <stdint.h>\n")
-    f.write("#include <stdbool.h>\n")
-    f.write("#include <stddef.h>\n")
-    f.write('#include "../include/_types.h"\n\n')
+    parts.append("#include <stdint.h>\n")
+    parts.append("#include <stdbool.h>\n")
+    parts.append("#include <stddef.h>\n")
+    parts.append('#include "../include/_types.h"\n\n')
+    f.write("".join(parts))
 
 
 def format_data_type(dt, indent=0):
@@ -533,14 +609,6 @@ def extract_struct_definition(dt, indent=0):
             if comp_name is None:
                 comp_name = "field_0x{:x}".format(comp_offset)
 
-            # Get type string with normalization
-            type_str = format_data_type(comp_type)
-            if type_str is None:
-                type_str = comp_type.getDisplayName()
-
-            # Normalize the type
-            type_str = normalize_ghidra_type(type_str)
-
             # Handle arrays
             if isinstance(comp_type, ArrayDataType):
                 elem_type = comp_type.getDataType()
@@ -560,6 +628,11 @@ def extract_struct_definition(dt, indent=0):
                     )
                 )
             else:
+                # Get type string with normalization
+                type_str = format_data_type(comp_type)
+                if type_str is None:
+                    type_str = comp_type.getDisplayName()
+                type_str = normalize_ghidra_type(type_str)
                 lines.append(
                     "{}    {} {};  /* offset: 0x{:x}, size: {} */".format(
                         indent_str, type_str, comp_name, comp_offset, comp_size
@@ -633,74 +706,78 @@ def collect_data_types(program):
     return structs, enums, typedefs
 
 
-def generate_types_header(output_dir, program_name, structs, enums, typedefs):
+def generate_elf_types_header(output_dir, program_name, structs, enums, typedefs):
     """Generate a header file containing all extracted types"""
     header_file = os.path.join(output_dir, "_types.h")
+    sorted_structs = sorted(structs, key=lambda x: x.getName())
+
+    parts = []
+    parts.append("/**\n")
+    parts.append(" * Data Types Header\n")
+    parts.append(" * Source: {}\n".format(program_name))
+    parts.append(" * Structures: {}\n".format(len(structs)))
+    parts.append(" * Enums: {}\n".format(len(enums)))
+    parts.append(" * Typedefs: {}\n".format(len(typedefs)))
+    parts.append(" * \n")
+    parts.append(" * Auto-generated by LibSurgeon from ELF decompilation\n")
+    parts.append(" */\n\n")
+
+    parts.append("#ifndef _TYPES_H_\n")
+    parts.append("#define _TYPES_H_\n\n")
+
+    parts.append("#include <stdint.h>\n")
+    parts.append("#include <stdbool.h>\n")
+    parts.append("#include <stddef.h>\n\n")
+
+    # Write unknown type definitions first
+    parts.append(UNKNOWN_TYPE_DEFS)
+    parts.append("\n")
+
+    # Write forward declarations for structures
+    if structs:
+        parts.append("/* Forward Declarations */\n")
+        for dt in sorted_structs:
+            parts.append("struct {};\n".format(dt.getName()))
+        parts.append("\n")
+
+    # Write enums
+    if enums:
+        parts.append("/* ============================================ */\n")
+        parts.append("/*                    ENUMS                     */\n")
+        parts.append("/* ============================================ */\n\n")
+        for dt in sorted(enums, key=lambda x: x.getName()):
+            definition = extract_struct_definition(dt)
+            if definition:
+                parts.append(definition)
+                parts.append("\n\n")
+
+    # Write typedefs
+    if typedefs:
+        parts.append("/* ============================================ */\n")
+        parts.append("/*                   TYPEDEFS                   */\n")
+        parts.append("/* ============================================ */\n\n")
+        for dt in sorted(typedefs, key=lambda x: x.getName()):
+            definition = extract_struct_definition(dt)
+            if definition:
+                parts.append(definition)
+                parts.append("\n")
+        parts.append("\n")
+
+    # Write structures
+    if structs:
+        parts.append("/* ============================================ */\n")
+        parts.append("/*                  STRUCTURES                  */\n")
+        parts.append("/* ============================================ */\n\n")
+        for dt in sorted_structs:
+            definition = extract_struct_definition(dt)
+            if definition:
+                parts.append(definition)
+                parts.append("\n\n")
+
+    parts.append("#endif /* _TYPES_H_ */\n")
 
     with open(header_file, "w") as f:
-        f.write("/**\n")
-        f.write(" * Data Types Header\n")
-        f.write(" * Source: {}\n".format(program_name))
-        f.write(" * Structures: {}\n".format(len(structs)))
-        f.write(" * Enums: {}\n".format(len(enums)))
-        f.write(" * Typedefs: {}\n".format(len(typedefs)))
-        f.write(" * \n")
-        f.write(" * Auto-generated by LibSurgeon from ELF decompilation\n")
-        f.write(" */\n\n")
-
-        f.write("#ifndef _TYPES_H_\n")
-        f.write("#define _TYPES_H_\n\n")
-
-        f.write("#include <stdint.h>\n")
-        f.write("#include <stdbool.h>\n")
-        f.write("#include <stddef.h>\n\n")
-
-        # Write unknown type definitions first
-        f.write(UNKNOWN_TYPE_DEFS)
-        f.write("\n")
-
-        # Write forward declarations for structures
-        if structs:
-            f.write("/* Forward Declarations */\n")
-            for dt in sorted(structs, key=lambda x: x.getName()):
-                f.write("struct {};\n".format(dt.getName()))
-            f.write("\n")
-
-        # Write enums
-        if enums:
-            f.write("/* ============================================ */\n")
-            f.write("/*                    ENUMS                     */\n")
-            f.write("/* ============================================ */\n\n")
-            for dt in sorted(enums, key=lambda x: x.getName()):
-                definition = extract_struct_definition(dt)
-                if definition:
-                    f.write(definition)
-                    f.write("\n\n")
-
-        # Write typedefs
-        if typedefs:
-            f.write("/* ============================================ */\n")
-            f.write("/*                   TYPEDEFS                   */\n")
-            f.write("/* ============================================ */\n\n")
-            for dt in sorted(typedefs, key=lambda x: x.getName()):
-                definition = extract_struct_definition(dt)
-                if definition:
-                    f.write(definition)
-                    f.write("\n")
-            f.write("\n")
-
-        # Write structures
-        if structs:
-            f.write("/* ============================================ */\n")
-            f.write("/*                  STRUCTURES                  */\n")
-            f.write("/* ============================================ */\n\n")
-            for dt in sorted(structs, key=lambda x: x.getName()):
-                definition = extract_struct_definition(dt)
-                if definition:
-                    f.write(definition)
-                    f.write("\n\n")
-
-        f.write("#endif /* _TYPES_H_ */\n")
+        f.write("".join(parts))
 
     return header_file
 
@@ -771,8 +848,9 @@ def main():
         )
     )
 
+    types_header = None
     if structs or enums or typedefs:
-        types_header = generate_types_header(
+        types_header = generate_elf_types_header(
             include_dir, program_name, structs, enums, typedefs
         )
         print("[Info] Generated types header: include/_types.h")
@@ -791,6 +869,8 @@ def main():
     func_count = 0
     thunk_count = 0
     external_count = 0
+    # Static functions of the same name in several objects share a module
+    module_by_name = {}
 
     for func in functions:
         if monitor.isCancelled():
@@ -808,17 +888,19 @@ def main():
 
         # Try to demangle C++ names
         display_name = func_name
-        if func_name.startswith("_Z"):
-            demangled = demangle_cpp_name(func_name, currentProgram)
-            if demangled and demangled != func_name:
-                display_name = demangled
-                # Track namespace
-                ns = extract_namespace(demangled)
-                if ns:
-                    namespaces_found.add(ns)
-
-        # Determine module
-        module_name = get_module_name(func_name, display_name, strategy)
+        demangled = demangle_cpp_name(func_name, currentProgram)
+        if demangled and demangled != func_name:
+            display_name = demangled
+            # Track namespace
+            ns = extract_namespace(demangled)
+            if ns:
+                namespaces_found.add(ns)
+
+        # Determine module; with a display name set, it alone decides it
+        module_name = module_by_name.get(display_name)
+        if module_name is None:
+            module_name = get_module_name(func_name, display_name, strategy)
+            module_by_name[display_name] = module_name
         module_functions[module_name].append((func, display_name, func_name))
         func_count += 1
 
@@ -864,11 +946,13 @@ def main():
 
     # Print module summary (top 20)
     print("\n[Info] Module breakdown (top 20):")
-    sorted_modules = sorted(module_functions.items(), key=lambda x: -len(x[1]))
-    for module_name, funcs in sorted_modules[:20]:
+    largest_modules = heapq.nlargest(
+        20, module_functions.items(), key=lambda x: len(x[1])
+    )
+    for module_name, funcs in largest_modules:
         print("  - {}: {} functions".format(module_name, len(funcs)))
-    if len(sorted_modules) > 20:
-        print("  ... and {} more modules".format(len(sorted_modules) - 20))
+    if len(module_functions) > 20:
+        print("  ... and {} more modules".format(len(module_functions) - 20))
 
     # Decompile and write each module
     print("\n[Info] Decompiling modules...")
@@ -882,15 +966,29 @@ def main():
     module_index = 0
     total_modules = len(module_functions)
 
+    # (class name, function name) -> (is_virtual, vtable index), first wins
+    method_virtual_info = {}
+    for cls in cpp_classes.values():
+        for m_mangled, m_name, m_virtual, m_idx in cls.methods:
+            key = (cls.name, m_mangled)
+            if key not in method_virtual_info:
+                method_virtual_info[key] = (m_virtual, m_idx)
+
+    # Sanitized file name per module, shared by sources, headers and index
+    safe_names = {m: sanitize_filename(m) for m in module_functions}
+
+    # Module order shared by sources, headers and the index
+    module_names_sorted = sorted(module_functions.keys())
+
     # Store function signatures for header file generation
     module_signatures = defaultdict(list)  # module_name -> [(func_name, signature)]
 
-    for module_name in sorted(module_functions.keys()):
+    for module_name in module_names_sorted:
         funcs = module_functions[module_name]
         module_index += 1
 
         # Create output filename in src directory
-        safe_module_name = sanitize_filename(module_name)
+        safe_module_name = safe_names[module_name]
         output_file = os.path.join(src_dir, "{}.cpp".format(safe_module_name))
 
         # Only print module info for first 5 and last one, or if total <= 10
@@ -906,26 +1004,27 @@ def main():
         module_decompiled = 0
         module_failed = 0
 
-        with open(output_file, "w") as f:
+        with open(output_file, "w", OUTPUT_BUFFER_SIZE) as f:
             write_file_header(f, module_name, len(funcs))
 
             # Add include for the module's own header (in ../include/)
             f.write('#include "../include/{}.h"\n\n'.format(safe_module_name))
 
-            # Sort functions by display name
-            sorted_funcs = sorted(funcs, key=lambda x: x[1])
+            # Sort functions by display name, in place so the index reuses it
+            funcs.sort(key=itemgetter(1))
 
-            for func, display_name, mangled_name in sorted_funcs:
+            for func, display_name, mangled_name in funcs:
                 if monitor.isCancelled():
                     break
 
                 current_func += 1
                 # Output progress for shell script to parse
-                print(
-                    "[PROGRESS] {}/{} {}".format(
-                        current_func, func_count, display_name[:50]
+                if current_func % PROGRESS_INTERVAL == 0 or current_func == func_count:
+                    print(
+                        "[PROGRESS] {}/{} {}".format(
+                            current_func, func_count, display_name[:50]
+                        )
                     )
-                )
 
                 # Decompile with class/struct enhancement
                 decompiled = get_decompiled_function_elf(
@@ -933,53 +1032,48 @@ def main():
                 )
 
                 if decompiled:
-                    # Extract signature for header file
-                    signature = extract_function_signature(decompiled)
+                    # Extract signature for header file (types already normalized)
+                    signature = extract_function_signature(
+                        decompiled, already_normalized=True
+                    )
                     if signature:
                         module_signatures[module_name].append((display_name, signature))
 
                     # Check if this is a virtual method
                     class_name = extract_class_from_method(display_name)
-                    is_virtual = False
-                    vtable_idx = -1
-                    if class_name and class_name in cpp_classes:
-                        for m_mangled, m_name, m_virtual, m_idx in cpp_classes[
-                            class_name
-                        ].methods:
-                            if m_mangled == mangled_name:
-                                is_virtual = m_virtual
-                                vtable_idx = m_idx
-                                break
-
-                    f.write("// " + "=" * 60 + "\n")
-                    f.write("// Function: {}\n".format(display_name))
+                    is_virtual, vtable_idx = method_virtual_info.get(
+                        (class_name, mangled_name), (False, -1)
+                    )
+
+                    parts = [FUNCTION_BANNER]
+                    parts.append("// Function: {}\n".format(display_name))
                     if mangled_name != display_name:
-                        f.write("// Mangled: {}\n".format(mangled_name))
+                        parts.append("// Mangled: {}\n".format(mangled_name))
                     if class_name:
-                        f.write("// Class: {}\n".format(class_name))
+                        parts.append("// Class: {}\n".format(class_name))
                     if is_virtual:
                         if vtable_idx >= 0:
-                            f.write(
+                            parts.append(
                                 "// Virtual: Yes (vtable index {})\n".format(vtable_idx)
                             )
                         else:
-                            f.write("// Virtual: Yes\n")
-                    f.write(
+                            parts.append("// Virtual: Yes\n")
+                    parts.append(
                         "// Address: 0x{:08x}\n".format(
                             func.getEntryPoint().getOffset()
                         )
                     )
-                    f.write("// " + "=" * 60 + "\n\n")
-                    f.write(decompiled)
-                    f.write("\n")
+                    parts.append(FUNCTION_BANNER)
+                    parts.append("\n")
+                    parts.append(decompiled)
+                    parts.append("\n")
+                    f.write("".join(parts))
                     module_decompiled += 1
                 else:
                     f.write(
-                        "// [FAILED] Could not decompile: {}\n".format(display_name)
-                    )
-                    f.write(
+                        "// [FAILED] Could not decompile: {}\n"
                         "// Address: 0x{:08x}\n\n".format(
-                            func.getEntryPoint().getOffset()
+                            display_name, func.getEntryPoint().getOffset()
                         )
                     )
                     module_failed += 1
@@ -1004,22 +1098,28 @@ def main():
     header_count = 0
     total_signatures = 0
 
-    for module_name in sorted(module_signatures.keys()):
-        signatures = module_signatures[module_name]
+    for module_name in module_names_sorted:
+        signatures = module_signatures.get(module_name)
         if signatures:
             generate_header_file(
-                include_dir, module_name, signatures, "ELF decompilation"
+                include_dir,
+                module_name,
+                signatures,
+                "ELF decompilation",
+                safe_names[module_name],
             )
             header_count += 1
             total_signatures += len(signatures)
 
-    # Generate types header
-    if header_count > 0:
+    # Generate the generic types header unless extracted types were written
+    if header_count > 0 and types_header is None:
         generate_types_header(include_dir)
 
     # Generate master header
     if header_count > 0:
-        generate_master_header(include_dir, module_signatures.keys(), program_name)
+        generate_master_header(
+            include_dir, module_signatures.keys(), program_name, safe_names
+        )
         print(
             "[Info] Generated {} header files with {} function declarations".format(
                 header_count, total_signatures
@@ -1063,9 +1163,9 @@ def main():
         f.write("## Modules\n\n")
         f.write("| Module | Functions | Source | Header |\n")
         f.write("|--------|-----------|--------|--------|\n")
-        for module_name in sorted(module_functions.keys()):
+        for module_name in module_names_sorted:
             count = len(module_functions[module_name])
-            safe_name = sanitize_filename(module_name)
+            safe_name = safe_names[module_name]
             sig_count = len(module_signatures.get(module_name, []))
             f.write(
                 "| {} | {} | `src/{}.cpp` | `include/{}.h` ({}) |\n".format(
@@ -1074,11 +1174,10 @@ def main():
             )
 
         f.write("\n## Function List by Module\n\n")
-        for module_name in sorted(module_functions.keys()):
+        for module_name in module_names_sorted:
             f.write("### {}\n\n".format(module_name))
-            for func, display_name, mangled_name in sorted(
-                module_functions[module_name], key=lambda x: x[1]
-            ):
+            # Already sorted by display name in the decompile loop
+            for func, display_name, mangled_name in module_functions[module_name]:
                 addr = "0x{:08x}".format(func.getEntryPoint().getOffset())
                 f.write("- `{}` @ {}\n".format(display_name, addr))
             f.write("\n")
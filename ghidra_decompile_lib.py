@@ -16,6 +16,7 @@ DWARF Debug Info Support:
 
 import os
 import sys
+from collections import defaultdict
 
 # Add the script's directory to Python path for importing ghidra_common
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -29,6 +30,8 @@ from java.io import File
 
 # Import shared utilities
 from ghidra_common import (
+    DECOMPILE_TIMEOUT,
+    OUTPUT_BUFFER_SIZE,
     demangle_cpp_name,
     extract_class_name,
     extract_function_signature,
@@ -36,6 +39,7 @@ from ghidra_common import (
     generate_header_file,
     generate_types_header,
     get_decompiled_function_basic,
+    get_skip_block_names,
     sanitize_filename,
     should_skip_function,
     write_file_header,
@@ -175,7 +179,7 @@ def apply_dwarf_variable_names(func, decomp_ifc, monitor):
         from ghidra.program.model.pcode import HighFunction
 
         # Get the high function from decompilation
-        results = decomp_ifc.decompileFunction(func, 60, monitor)
+        results = decomp_ifc.decompileFunction(func, DECOMPILE_TIMEOUT, monitor)
         if not results or not results.decompileCompleted():
             return False
 
@@ -386,10 +390,14 @@ def main():
     functions = func_manager.getFunctions(True)
 
     # Organize functions by class/namespace
-    class_functions = {}
+    class_functions = defaultdict(list)
     standalone_functions = []
     namespaces_found = set()
 
+    # Look up memory and the blocks to skip once, not per function
+    memory = currentProgram.getMemory()
+    skip_blocks = get_skip_block_names(memory)
+
     func_count = 0
     skipped_count = 0
     for func in functions:
@@ -397,30 +405,25 @@ def main():
             break
 
         # Skip external symbols and special sections
-        if should_skip_function(func, currentProgram):
+        if should_skip_function(func, currentProgram, skip_blocks, memory):
             skipped_count += 1
             continue
 
         func_name = func.getName()
 
         # Try to demangle
-        if func_name.startswith("_Z"):
-            demangled = demangle_cpp_name(func_name, currentProgram)
-            if demangled and demangled != func_name:
-                # Track namespace
-                ns = extract_namespace(demangled)
-                if ns:
-                    namespaces_found.add(ns)
-
-                class_name = extract_class_name(demangled)
-                if class_name:
-                    if class_name not in class_functions:
-                        class_functions[class_name] = []
-                    class_functions[class_name].append((func, demangled))
-                else:
-                    standalone_functions.append((func, demangled))
+        demangled = demangle_cpp_name(func_name, currentProgram)
+        if demangled and demangled != func_name:
+            # Track namespace
+            ns = extract_namespace(demangled)
+            if ns:
+                namespaces_found.add(ns)
+
+            class_name = extract_class_name(demangled)
+            if class_name:
+                class_functions[class_name].append((func, demangled))
             else:
-                standalone_functions.append((func, func_name))
+                standalone_functions.append((func, demangled))
         else:
             standalone_functions.append((func, func_name))
 
@@ -446,7 +449,7 @@ def main():
     decompiled_count = 0
     failed_count = 0
 
-    with open(output_file, "w") as f:
+    with open(output_file, "w", OUTPUT_BUFFER_SIZE) as f:
         # Write file header with debug info status
         write_file_header(f, base_name, func_count, program_name)
 
@@ -752,25 +752,34 @@ def decompile_object_file(
 
         if os.path.isfile(temp_output):
             shutil.move(temp_output, output_file)
+            with open(output_file, "r") as f:
+                code = f.read()
 
-            # Apply DWARF debug info post-processing
+            # Apply DWARF debug info post-processing. The info is parsed
+            # here, once the output is known, and dropped once applied.
             try:
-                from dwarf_parser import apply_dwarf_to_code, parse_dwarf_info
+                from dwarf_parser import (
+                    apply_dwarf_to_code,
+                    find_function_names,
+                    parse_dwarf_info,
+                )
 
-                dwarf_info = parse_dwarf_info(obj_file)
+                # Only functions present in the output need their DWARF parsed
+                dwarf_info = parse_dwarf_info(
+                    obj_file, find_function_names(code), cache=False
+                )
                 if dwarf_info.has_local_vars:
-                    with open(output_file, "r") as f:
-                        code = f.read()
                     enhanced_code = apply_dwarf_to_code(code, dwarf_info)
                     with open(output_file, "w") as f:
                         f.write(enhanced_code)
+                    code = enhanced_code
             except ImportError:
                 pass  # DWARF parser not available
             except Exception:
                 pass  # DWARF processing failed, keep original
 
-            with open(output_file, "r") as f:
-                result.lines = sum(1 for _ in f)
+            # Same count as iterating over the file's lines
+            result.lines = code.count("\n") + (not code.endswith("\n") and bool(code))
             result.success = True
         else:
             result.error = "No output file generated"
@@ -175,7 +175,7 @@ def load_file(args: Tuple[Path, str, List[str]]) -> FileData:
         normalized = normalize_code(content, filename, variants)
         return FileData(
             filename=filename,
-            lines=len(content.split("\n")),
+            lines=content.count("\n") + 1,
             normalized=normalized,
         )
     except Exception as e:
@@ -17,6 +17,9 @@ import pytest
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Keep test runs independent of the on-disk caches, even if enabled by the user
+os.environ["LIBSURGEON_CACHE"] = "0"
+
 
 # ============================================================
 # Fixtures
@@ -11,6 +11,8 @@ import json
 import os
 import sys
 
+import pytest
+
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -375,6 +377,102 @@ class TestDebugInfoIntegration:
 # Test: DWARF Parser
 # ============================================================
 
+# Abridged `readelf --debug-dump=info` output in ARMCC style (inline strings)
+READELF_SAMPLE = """Contents of the .debug_info section:
+
+  Compilation Unit @ offset 0x0:
+   Length:        0x80 (32-bit)
+   Version:       3
+   Abbrev Offset: 0x0
+   Pointer Size:  4
+ <0><b>: Abbrev Number: 1 (DW_TAG_compile_unit)
+    <c>   DW_AT_producer    : ARM/Thumb C/C++ Compiler, 5.06
+    <10>   DW_AT_name        : widget.c
+ <1><20>: Abbrev Number: 2 (DW_TAG_base_type)
+    <21>   DW_AT_byte_size   : 4
+    <22>   DW_AT_encoding    : 5\t(signed)
+    <23>   DW_AT_name        : int
+ <1><28>: Abbrev Number: 3 (DW_TAG_pointer_type)
+    <29>   DW_AT_type        : <0x20>
+ <1><30>: Abbrev Number: 4 (DW_TAG_subprogram)
+    <31>   DW_AT_name        : widget_draw
+    <35>   DW_AT_low_pc      : 0x100
+    <39>   DW_AT_high_pc     : 0x140
+    <3d>   DW_AT_decl_line   : 12
+ <2><41>: Abbrev Number: 5 (DW_TAG_formal_parameter)
+    <42>   DW_AT_name        : count
+    <46>   DW_AT_type        : <0x20>
+    <4a>   DW_AT_location    : 1 byte block: 50 \t(DW_OP_reg0 (r0))
+ <2><4d>: Abbrev Number: 5 (DW_TAG_formal_parameter)
+    <4e>   DW_AT_name        : out
+    <52>   DW_AT_type        : <0x28>
+ <2><56>: Abbrev Number: 6 (DW_TAG_variable)
+    <57>   DW_AT_name        : total
+    <5b>   DW_AT_type        : <0x20>
+ <2><5f>: Abbrev Number: 6 (DW_TAG_variable)
+    <60>   DW_AT_name        : __result
+    <64>   DW_AT_artificial  : 1
+ <1><68>: Abbrev Number: 6 (DW_TAG_variable)
+    <69>   DW_AT_name        : g_widgets
+    <6d>   DW_AT_type        : <0x20>
+"""
+
+DWARFDUMP_SAMPLE = """widget.o:\tfile format elf32-littlearm
+
+.debug_info contents:
+0x00000000: Compile Unit: length = 0x00000080, format = DWARF32, version = 0x0003, abbr_offset = 0x0000, addr_size = 0x04 (next unit at 0x00000084)
+
+0x0000000b: DW_TAG_compile_unit
+              DW_AT_producer [DW_FORM_string]\t("ARM/Thumb C/C++ Compiler, 5.06")
+              DW_AT_name [DW_FORM_string]\t("widget.c")
+
+0x00000020:   DW_TAG_base_type
+                DW_AT_byte_size [DW_FORM_data1]\t(0x04)
+                DW_AT_encoding [DW_FORM_data1]\t(DW_ATE_signed)
+                DW_AT_name [DW_FORM_string]\t("int")
+
+0x00000028:   DW_TAG_pointer_type
+                DW_AT_type [DW_FORM_ref4]\t(0x00000020 "int")
+
+0x00000030:   DW_TAG_subprogram
+                DW_AT_name [DW_FORM_string]\t("widget_draw")
+                DW_AT_low_pc [DW_FORM_addr]\t(0x00000100)
+                DW_AT_high_pc [DW_FORM_addr]\t(0x00000140)
+                DW_AT_decl_line [DW_FORM_data1]\t(12)
+
+0x00000041:     DW_TAG_formal_parameter
+                  DW_AT_name [DW_FORM_string]\t("count")
+                  DW_AT_type [DW_FORM_ref4]\t(0x00000020 "int")
+                  DW_AT_location [DW_FORM_block1]\t(DW_OP_reg0 R0)
+
+0x0000004d:     DW_TAG_formal_parameter
+                  DW_AT_name [DW_FORM_string]\t("out")
+                  DW_AT_type [DW_FORM_ref4]\t(0x00000028 "int *")
+
+0x00000056:     DW_TAG_variable
+                  DW_AT_name [DW_FORM_string]\t("total")
+                  DW_AT_type [DW_FORM_ref4]\t(0x00000020 "int")
+
+0x0000005f:     DW_TAG_variable
+                  DW_AT_name [DW_FORM_string]\t("__result")
+                  DW_AT_artificial [DW_FORM_flag]\t(0x01)
+
+0x00000067:     NULL
+
+0x00000068:   DW_TAG_variable
+                DW_AT_name [DW_FORM_string]\t("g_widgets")
+                DW_AT_type [DW_FORM_ref4]\t(0x00000020 "int")
+
+0x00000070:   NULL
+"""
+
+# C++ source whose functions are declared inside namespace and class scopes
+CPP_SCOPES_SOURCE = """namespace ns { int add(int a, int b) { return a + b; } }
+struct K { int m(int v); };
+int K::m(int v) { return v + 1; }
+int greet(const char *src) { int t = src[0]; return t; }
+"""
+
 
 class TestDwarfParser:
     """Tests for the DWARF debug info parser"""
@@ -617,6 +715,292 @@ class TestDwarfParser:
         assert info.functions == {}
         assert info.has_local_vars is False
 
+    def test_parse_dwarf_info_fixture_object(self):
+        """Test parsing real DWARF info from the fixture object file"""
+        pytest.importorskip("elftools")
+        from dwarf_parser import parse_dwarf_info
+
+        obj_file = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "fixtures", "test_library.o"
+        )
+        info = parse_dwarf_info(obj_file)
+
+        assert info.source_file == "test_library.c"
+        assert info.has_local_vars is True
+        assert [p.name for p in info.functions["add"].parameters] == ["a", "b"]
+        assert info.functions["add"].parameters[0].type_name == "int"
+        assert [v.name for v in info.functions["string_length"].local_variables] == [
+            "len"
+        ]
+        assert info.functions["string_copy"].parameters[1].type_name == "char*"
+
+    def test_parse_dwarf_info_cached_until_modified(self, temp_dir):
+        """Test that unchanged object files are only parsed once"""
+        import shutil
+
+        from dwarf_parser import parse_dwarf_info
+
+        obj_file = os.path.join(temp_dir, "test_library.o")
+        shutil.copy(
+            os.path.join(
+                os.path.dirname(os.path.abspath(__file__)), "fixtures", "test_library.o"
+            ),
+            obj_file,
+        )
+
+        info = parse_dwarf_info(obj_file)
+        assert parse_dwarf_info(obj_file) is info
+
+        stat = os.stat(obj_file)
+        os.utime(obj_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert parse_dwarf_info(obj_file) is not info
+        assert parse_dwarf_info(obj_file) == info
+
+        # Results parsed with cache=False are not retained
+        uncached = parse_dwarf_info(obj_file, ["main"], cache=False)
+        assert parse_dwarf_info(obj_file, ["main"], cache=False) is not uncached
+
+    def test_parse_dwarf_info_disk_cache(self, temp_dir, monkeypatch):
+        """Test that parsed DWARF info is reused from the opt-in disk cache"""
+        import dwarf_parser
+
+        cache_dir = os.path.join(temp_dir, "cache")
+        monkeypatch.delenv("LIBSURGEON_CACHE")
+        monkeypatch.setattr(dwarf_parser, "DWARF_CACHE_DIR", cache_dir)
+        monkeypatch.setattr(dwarf_parser, "_dwarf_info_cache", {})
+
+        obj_file = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "fixtures", "test_library.o"
+        )
+        info = dwarf_parser.parse_dwarf_info(obj_file)
+        assert not os.path.exists(cache_dir)
+
+        # Opt in
+        monkeypatch.setenv("LIBSURGEON_CACHE", "1")
+        monkeypatch.setattr(dwarf_parser, "_dwarf_info_cache", {})
+        assert dwarf_parser.parse_dwarf_info(obj_file) == info
+        assert len(os.listdir(cache_dir)) == 1
+
+        # A new process starts with an empty in-memory cache
+        monkeypatch.setattr(dwarf_parser, "_dwarf_info_cache", {})
+        monkeypatch.setattr(dwarf_parser, "_read_dwarf_info", None)
+        assert dwarf_parser.parse_dwarf_info(obj_file) == info
+
+    @pytest.mark.parametrize(
+        "error", [OverflowError, AssertionError, KeyError, MemoryError, ValueError]
+    )
+    def test_parse_dwarf_info_corrupt_object(self, error, monkeypatch, capsys):
+        """Test that pyelftools errors on corrupt objects give empty info"""
+        import dwarf_parser
+
+        def raise_error(*args):
+            raise error()
+
+        monkeypatch.setattr(dwarf_parser, "HAS_PYELFTOOLS", True)
+        monkeypatch.setattr(dwarf_parser, "_parse_with_pyelftools", raise_error)
+        monkeypatch.setattr(dwarf_parser, "_dwarf_info_cache", {})
+
+        obj_file = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "fixtures", "test_library.o"
+        )
+        info = dwarf_parser.parse_dwarf_info(obj_file, backend="pyelftools")
+        assert info == dwarf_parser.DwarfInfo()
+        assert obj_file in capsys.readouterr().err
+
+    def test_parse_dwarf_info_parser_error_warns(self, monkeypatch, capsys):
+        """Test that a dump parser error is reported instead of swallowed"""
+        import shutil
+
+        import dwarf_parser
+
+        if shutil.which("readelf") is None:
+            pytest.skip("readelf not available")
+
+        def raise_error(*args):
+            raise ValueError("unexpected DW_AT_type")
+
+        monkeypatch.setattr(dwarf_parser, "_parse_dwarf_output", raise_error)
+
+        obj_file = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "fixtures", "test_library.o"
+        )
+        info = dwarf_parser._read_dwarf_info(obj_file, None, "readelf")
+        assert info == dwarf_parser.DwarfInfo()
+        err = capsys.readouterr().err
+        assert obj_file in err and "unexpected DW_AT_type" in err
+
+    def test_parse_readelf_output(self):
+        """Test the readelf text fallback parser"""
+        from dwarf_parser import _parse_dwarf_output
+
+        info = _parse_dwarf_output(READELF_SAMPLE.encode("utf-8"))
+
+        assert info.compiler == "ARM/Thumb C/C++ Compiler, 5.06"
+        assert info.source_file == "widget.c"
+        assert info.dwarf_version == 3
+        assert list(info.functions) == ["widget_draw"]
+
+        func = info.functions["widget_draw"]
+        assert func.low_pc == 0x100
+        assert func.high_pc == 0x140
+        assert func.source_line == 12
+        assert [p.name for p in func.parameters] == ["count", "out"]
+        assert func.parameters[0].location == "r0"
+        assert [p.type_name for p in func.parameters] == ["int", "int*"]
+        # Artificial and global variables are not locals
+        assert [v.name for v in func.local_variables] == ["total"]
+
+    def test_parse_only_requested_functions(self):
+        """Test that function_names limits which functions are parsed"""
+        from dwarf_parser import _parse_dwarf_output, find_function_names
+
+        code = "int widget_draw(int param_1, int *param_2)\n{\n}\nvoid other(void)\n"
+        names = find_function_names(code)
+        assert names == {"widget_draw", "other"}
+
+        info = _parse_dwarf_output(READELF_SAMPLE.encode("utf-8"), names)
+        assert list(info.functions) == ["widget_draw"]
+
+        info = _parse_dwarf_output(READELF_SAMPLE.encode("utf-8"), {"other"})
+        assert info.functions == {}
+        assert info.has_local_vars is False
+        assert info.source_file == "widget.c"
+
+    def test_parse_dwarfdump_output(self):
+        """Test that llvm-dwarfdump output parses like the same readelf dump"""
+        from dwarf_parser import _parse_dwarf_output, _parse_dwarfdump_output
+
+        info = _parse_dwarfdump_output(DWARFDUMP_SAMPLE.encode("utf-8"))
+
+        assert info == _parse_dwarf_output(READELF_SAMPLE.encode("utf-8"))
+        assert info.functions["widget_draw"].parameters[0].location == "r0"
+
+    @pytest.mark.parametrize("backend", ["readelf", "llvm-dwarfdump"])
+    def test_parse_dwarf_info_backends_agree(self, backend):
+        """Test that the dump tool backends agree on the fixture object file"""
+        import shutil
+
+        import dwarf_parser
+        from dwarf_parser import parse_dwarf_info
+
+        if shutil.which(backend) is None:
+            pytest.skip(f"{backend} not available")
+
+        obj_file = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "fixtures", "test_library.o"
+        )
+        info = parse_dwarf_info(obj_file, backend=backend)
+
+        assert info.source_file == "test_library.c"
+        assert info.dwarf_version == 5
+        assert [p.name for p in info.functions["add"].parameters] == ["a", "b"]
+        assert info.functions["add"].high_pc == 24
+
+        # Pointers are resolved through const qualifiers and typedefs
+        def types(func_name):
+            func = info.functions[func_name]
+            return [v.type_name for v in func.parameters + func.local_variables]
+
+        assert types("string_copy") == ["char*", "char*", "int", "int"]
+        assert types("rect_contains_point") == ["Rectangle*", "Point*"]
+        assert types("count_bits") == ["uint32_t", "int"]
+
+        if dwarf_parser.HAS_PYELFTOOLS:
+            assert info == dwarf_parser.parse_dwarf_info(obj_file, backend="pyelftools")
+
+    @pytest.mark.parametrize("backend", ["pyelftools", "readelf", "llvm-dwarfdump"])
+    def test_parse_dwarf_info_backends_agree_cpp_scopes(self, backend, temp_dir):
+        """Test that functions in C++ namespaces and classes are found"""
+        import shutil
+        import subprocess
+
+        import dwarf_parser
+
+        if backend == "pyelftools":
+            pytest.importorskip("elftools")
+        elif shutil.which(backend) is None:
+            pytest.skip(f"{backend} not available")
+
+        cpp_file = os.path.join(temp_dir, "scopes.cpp")
+        obj_file = os.path.join(temp_dir, "scopes.o")
+        with open(cpp_file, "w") as f:
+            f.write(CPP_SCOPES_SOURCE)
+        try:
+            subprocess.run(
+                ["g++", "-g", "-c", cpp_file, "-o", obj_file],
+                check=True,
+                capture_output=True,
+            )
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            pytest.skip("g++ not available")
+
+        info = dwarf_parser.parse_dwarf_info(obj_file, backend=backend)
+
+        assert sorted(info.functions) == ["add", "greet", "m"]
+        assert [p.name for p in info.functions["greet"].parameters] == ["src"]
+        assert [v.name for v in info.functions["greet"].local_variables] == ["t"]
+        assert info.functions["greet"].parameters[0].type_name == "char*"
+
+    def test_resolve_readelf_type(self):
+        """Test type resolution through qualifiers, typedefs and pointers"""
+        from dwarf_parser import _resolve_readelf_type
+
+        type_dies = {
+            b"10": (b"DW_TAG_base_type", "char", None),
+            b"20": (b"DW_TAG_const_type", "", b"10"),
+            b"30": (b"DW_TAG_pointer_type", "", b"20"),
+            b"40": (b"DW_TAG_structure_type", "", None),
+            b"50": (b"DW_TAG_pointer_type", "", b"40"),
+            b"60": (b"DW_TAG_pointer_type", "", b"50"),
+            b"70": (b"DW_TAG_pointer_type", "", b"70"),
+        }
+
+        assert _resolve_readelf_type(b"30", type_dies) == "char*"
+        assert _resolve_readelf_type(b"40", type_dies) == "unknown"
+        assert _resolve_readelf_type(b"60", type_dies) == "void**"
+        assert _resolve_readelf_type(None, type_dies) == "unknown"
+        # A corrupt self-referencing chain ends instead of looping
+        assert _resolve_readelf_type(b"70", type_dies).startswith("void*")
+
+    def test_parse_dwarf_info_auto_backend(self, monkeypatch):
+        """Test that "auto" uses a dump tool and falls back to pyelftools"""
+        import dwarf_parser
+
+        obj_file = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "fixtures", "test_library.o"
+        )
+        used = []
+        monkeypatch.setattr(
+            dwarf_parser,
+            "_parse_with_pyelftools",
+            lambda *args: used.append("pyelftools") or dwarf_parser.DwarfInfo(),
+        )
+        monkeypatch.setattr(dwarf_parser, "HAS_PYELFTOOLS", True)
+
+        if dwarf_parser._LLVM_DWARFDUMP or dwarf_parser._READELF:
+            dwarf_parser._read_dwarf_info(obj_file, None, "auto")
+            assert used == []
+
+        monkeypatch.setattr(dwarf_parser, "_LLVM_DWARFDUMP", None)
+        monkeypatch.setattr(dwarf_parser, "_READELF", None)
+        dwarf_parser._read_dwarf_info(obj_file, None, "auto")
+        assert used == ["pyelftools"]
+
+    def test_parse_readelf_forward_type_reference(self):
+        """Test that types defined after their first use are still resolved"""
+        from dwarf_parser import _parse_dwarf_output
+
+        # Move the type DIEs to the end of the compilation unit
+        lines = READELF_SAMPLE.splitlines()
+        types = lines[10:16]
+        sample = "\n".join(lines[:10] + lines[16:] + types)
+
+        info = _parse_dwarf_output(sample.encode("utf-8"))
+
+        func = info.functions["widget_draw"]
+        assert [p.type_name for p in func.parameters] == ["int", "int*"]
+        assert func.local_variables[0].type_name == "int"
+
     def test_apply_dwarf_preserves_structure(self):
         """Test that code structure is preserved after DWARF application"""
         from dwarf_parser import (
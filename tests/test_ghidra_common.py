@@ -8,16 +8,25 @@ Tests for header file generation, code normalization, and code cleaning.
 
 import os
 
-import pytest  # noqa: F401 - used by fixtures
+import pytest
 
+import ghidra_common
 from ghidra_common import (
+    SKIP_FUNCTION_PATTERNS,
     clean_decompiled_code,
+    demangle_cpp_name,
+    enhance_decompiled_code,
+    extract_class_from_method,
     extract_function_signature,
+    extract_namespace,
     generate_header_file,
     generate_master_header,
     generate_types_header,
+    get_skip_block_names,
     normalize_code_types,
+    normalize_ghidra_type,
     sanitize_filename,
+    should_skip_function,
 )
 
 
@@ -68,6 +77,17 @@ multiline_function(int a,
         sig = extract_function_signature(code)
         assert sig is not None
 
+    def test_extract_function_signature_already_normalized(self):
+        """Test that normalized code is not normalized a second time"""
+        code = normalize_code_types("undefined4 func(dword param_1)\n{\n}\n")
+        assert extract_function_signature(code, already_normalized=True) == (
+            extract_function_signature(code)
+        )
+        assert (
+            extract_function_signature("undefined4 f(void)\n{", already_normalized=True)
+            == "undefined4 f(void)"
+        )
+
     def test_extract_function_signature_empty(self):
         """Test extracting from empty/invalid code"""
         assert extract_function_signature("") is None
@@ -129,6 +149,31 @@ multiline_function(int a,
         assert "module_b.h" in content
         assert "module_c.h" in content
 
+    def test_generate_master_header_from_iterator(self, temp_dir):
+        """Test that a one-shot iterator of module names is fully included"""
+        modules = iter(["module_b", "module_a"])
+        master_path = generate_master_header(temp_dir, modules, "test_program")
+
+        with open(master_path, "r") as f:
+            content = f.read()
+
+        assert " * Modules: 2\n" in content
+        assert content.index("module_a.h") < content.index("module_b.h")
+
+    def test_generate_master_header_with_safe_names(self, temp_dir):
+        """Test that precomputed file names are used, with a fallback"""
+        modules = ["ns::Widget", "other mod"]
+        safe_names = {"ns::Widget": "ns__Widget"}
+        master_path = generate_master_header(
+            temp_dir, modules, "test_program", safe_names
+        )
+
+        with open(master_path, "r") as f:
+            content = f.read()
+
+        assert '#include "ns__Widget.h"' in content
+        assert '#include "{}.h"'.format(sanitize_filename("other mod")) in content
+
     def test_generate_types_header(self, temp_dir):
         """Test generating types header file"""
         types_path = generate_types_header(temp_dir)
@@ -172,6 +217,17 @@ class TestNormalizeCodeTypes:
         assert "uint8_t" in normalized
         assert "void *" in normalized
 
+    def test_normalize_ghidra_type(self, monkeypatch):
+        """Test single type normalization, including pointers and caching"""
+        monkeypatch.setattr(ghidra_common, "_NORMALIZED_TYPE_CACHE", {})
+        assert normalize_ghidra_type("dword") == "uint32_t"
+        assert normalize_ghidra_type("undefined4 **") == "unk32_t **"
+        assert normalize_ghidra_type("MyStruct") == "MyStruct"
+        assert normalize_ghidra_type("") == ""
+        assert normalize_ghidra_type(None) is None
+        assert ghidra_common._NORMALIZED_TYPE_CACHE["undefined4 **"] == "unk32_t **"
+        assert normalize_ghidra_type("undefined4 **") == "unk32_t **"
+
 
 class TestSanitizeFilename:
     """Tests for filename sanitization"""
@@ -192,6 +248,62 @@ class TestSanitizeFilename:
         result = sanitize_filename("test file name")
         assert " " not in result
 
+    def test_sanitize_cached(self, monkeypatch):
+        """Test that repeated names reuse the cached result"""
+        monkeypatch.setattr(ghidra_common, "_SAFE_NAME_CACHE", {})
+        assert sanitize_filename("Foo::Bar") == "Foo_Bar"
+        assert ghidra_common._SAFE_NAME_CACHE == {"Foo::Bar": "Foo_Bar"}
+        assert sanitize_filename("Foo::Bar") == "Foo_Bar"
+
+
+class TestExtractClassFromMethod:
+    """Tests for class name extraction from method signatures"""
+
+    def test_extract_class_cached(self, monkeypatch):
+        """Test that repeated display names reuse the cached class name"""
+        monkeypatch.setattr(ghidra_common, "_METHOD_CLASS_CACHE", {})
+        name = "void Namespace::Class::Method(int)"
+        assert extract_class_from_method(name) == "Namespace::Class"
+        assert ghidra_common._METHOD_CLASS_CACHE == {name: "Namespace::Class"}
+        assert extract_class_from_method(name) == "Namespace::Class"
+        assert extract_class_from_method("void Draw(void)") is None
+        assert len(ghidra_common._METHOD_CLASS_CACHE) == 1
+
+
+class TestExtractNamespace:
+    """Tests for top-level namespace extraction"""
+
+    def test_extract_namespace(self):
+        """Test that only the first scope component is returned"""
+        assert extract_namespace("xxgfx::Bitmap::Draw(void)") == "xxgfx"
+        assert extract_namespace("Bitmap::Draw") == "Bitmap"
+        assert extract_namespace("::Draw") == ""
+        assert extract_namespace("draw_bitmap") is None
+
+
+class TestDemangleCppName:
+    """Tests for C++ name demangling"""
+
+    def test_demangle_without_ghidra_returns_name(self, monkeypatch):
+        """Test that names are returned unchanged when demangling fails"""
+        monkeypatch.setattr(ghidra_common, "_DEMANGLE_CACHE", {})
+        assert demangle_cpp_name("_ZN8CoreView4DrawEv", None) == "_ZN8CoreView4DrawEv"
+
+    def test_demangle_results_are_cached(self, monkeypatch):
+        """Test that each mangled name is only demangled once"""
+        monkeypatch.setattr(ghidra_common, "HAS_DEMANGLER", True)
+        monkeypatch.setattr(
+            ghidra_common, "_DEMANGLE_CACHE", {"_ZN8CoreView4DrawEv": "CoreView::Draw"}
+        )
+        assert demangle_cpp_name("_ZN8CoreView4DrawEv", None) == "CoreView::Draw"
+
+    def test_demangle_skips_unmangled_names(self, monkeypatch):
+        """Test that plain C names never reach the demangler"""
+        monkeypatch.setattr(ghidra_common, "HAS_DEMANGLER", True)
+        monkeypatch.setattr(ghidra_common, "_DEMANGLE_CACHE", {})
+        assert demangle_cpp_name("main", None) == "main"
+        assert ghidra_common._DEMANGLE_CACHE == {}
+
 
 class TestDirectorySeparation:
     """Tests for src/include directory separation"""
@@ -432,3 +544,148 @@ void TestFunc(void)
         # Function should still be valid
         assert "void * CMemStore::Alloc" in cleaned
         assert "return pvVar1;" in cleaned
+
+
+class TestEnhanceDecompiledCode:
+    """Tests for field and vtable annotation"""
+
+    def test_vtable_calls_and_fields_annotated(self):
+        """Test that vtable calls are marked and fields inside them counted"""
+        code = (
+            "void Foo::bar(Foo *this)\n"
+            "{\n"
+            "  this->field_0x4 = this->field_0x8;\n"
+            "  this->field_0xc = 0;\n"
+            "  (**(code **)(*(field_0x10) + 0x18))(this);\n"
+            "}\n"
+        )
+        enhanced = enhance_decompiled_code(code, {}, {})
+
+        assert "(**(code **)(*(field_0x10) + 0x18)) /* vtable[0x18] */(this);" in (
+            enhanced
+        )
+        assert "// NOTE: 4 unknown struct fields accessed" in enhanced
+        assert enhanced.index("// NOTE") > enhanced.index("{")
+
+    def test_missing_info_maps(self):
+        """Test that class and struct maps may be omitted"""
+        code = "void f(void)\n{\n  (**(code **)(*param_1 + 0x8))();\n}\n"
+        assert enhance_decompiled_code(code, None, None) == (
+            enhance_decompiled_code(code, {}, {})
+        )
+
+
+class _FakeBlock:
+    def __init__(self, name):
+        self.name = name
+
+    def getName(self):
+        return self.name
+
+
+class _FakeProgram:
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.block_lookups = 0
+
+    def getMemory(self):
+        return self
+
+    def getBlock(self, addr):
+        self.block_lookups += 1
+        return self.blocks.get(addr)
+
+    def getBlocks(self):
+        return list(self.blocks.values())
+
+
+class _FakeFunction:
+    def __init__(self, name, addr=0, external=False, thunk=False):
+        self.name = name
+        self.addr = addr
+        self.external = external
+        self.thunk = thunk
+
+    def getName(self):
+        return self.name
+
+    def getEntryPoint(self):
+        return self.addr
+
+    def isExternal(self):
+        return self.external
+
+    def isThunk(self):
+        return self.thunk
+
+
+class TestShouldSkipFunction:
+    """Tests for decompilation function filtering"""
+
+    def test_skip_by_name_without_block_lookup(self):
+        """Test that library names are skipped before any memory lookup"""
+        program = _FakeProgram({0: _FakeBlock(".text")})
+        assert should_skip_function(_FakeFunction("__cxa_atexit"), program)
+        assert should_skip_function(_FakeFunction("_GLOBAL__sub_I_foo"), program)
+        assert program.block_lookups == 0
+
+    def test_skip_every_pattern(self):
+        """Test that each skip pattern is matched anywhere in the name"""
+        program = _FakeProgram({})
+        for pattern in SKIP_FUNCTION_PATTERNS:
+            assert should_skip_function(_FakeFunction(pattern), program)
+            assert should_skip_function(_FakeFunction("x" + pattern + "x"), program)
+        assert not should_skip_function(_FakeFunction("lv_obj_create"), program)
+
+    def test_skip_external_and_thunk(self):
+        """Test that external and thunk functions are skipped"""
+        program = _FakeProgram({})
+        assert should_skip_function(_FakeFunction("memcpy", external=True), program)
+        assert should_skip_function(_FakeFunction("memcpy", thunk=True), program)
+
+    def test_skip_by_memory_block(self):
+        """Test that functions in EXTERNAL and .group blocks are skipped"""
+        program = _FakeProgram(
+            {
+                0: _FakeBlock("EXTERNAL"),
+                1: _FakeBlock(".group.foo"),
+                2: _FakeBlock(".text"),
+            }
+        )
+        assert should_skip_function(_FakeFunction("a", addr=0), program)
+        assert should_skip_function(_FakeFunction("b", addr=1), program)
+        assert not should_skip_function(_FakeFunction("c", addr=2), program)
+        assert not should_skip_function(_FakeFunction("d", addr=3), program)
+
+    def test_skip_with_precomputed_blocks(self):
+        """Test that precomputed skip blocks give the same answers"""
+        program = _FakeProgram({0: _FakeBlock("EXTERNAL"), 1: _FakeBlock(".group.foo")})
+        skip_blocks = get_skip_block_names(program.getMemory())
+        assert skip_blocks == {"EXTERNAL", ".group.foo"}
+        assert should_skip_function(_FakeFunction("a", addr=0), program, skip_blocks)
+        assert should_skip_function(_FakeFunction("b", addr=1), program, skip_blocks)
+        assert not should_skip_function(
+            _FakeFunction("c", addr=2), program, skip_blocks
+        )
+
+    def test_skip_blocks_absent_avoids_lookups(self):
+        """Test that no block lookups happen when no block is skippable"""
+        program = _FakeProgram({0: _FakeBlock(".text")})
+        skip_blocks = get_skip_block_names(program.getMemory())
+        assert not should_skip_function(_FakeFunction("a"), program, skip_blocks)
+        assert program.block_lookups == 0
+
+
+class TestDecompileTimeout:
+    """Tests for the decompiler timeout setting"""
+
+    @pytest.mark.parametrize(
+        "value, expected", [("20", 20), ("abc", 60), ("0", 60), (None, 60)]
+    )
+    def test_timeout_from_environment(self, monkeypatch, value, expected):
+        """Test that LIBSURGEON_DECOMPILE_TIMEOUT overrides the default"""
+        if value is None:
+            monkeypatch.delenv("LIBSURGEON_DECOMPILE_TIMEOUT", raising=False)
+        else:
+            monkeypatch.setenv("LIBSURGEON_DECOMPILE_TIMEOUT", value)
+        assert ghidra_common.get_decompile_timeout() == expected
@@ -47,6 +47,56 @@ class TestQualityEvaluation:
         assert project.files_with_halt_baddata == 1
         assert project.total_halt_baddata == 2
         assert 0 <= project.avg_quality_score <= 100
+        assert project.file_scores == [m.quality_score for m in project.file_metrics]
+
+    def test_analyze_directory_parallel(
+        self, sample_cpp_file, sample_bad_cpp_file, temp_dir
+    ):
+        """Test that parallel analysis matches sequential analysis"""
+        sequential = analyze_directory(temp_dir, num_workers=1)
+        parallel = analyze_directory(temp_dir, num_workers=2)
+
+        assert parallel.file_metrics == sequential.file_metrics
+        assert parallel.avg_quality_score == sequential.avg_quality_score
+
+    def test_analyze_directory_cache(
+        self, sample_cpp_file, sample_bad_cpp_file, temp_dir, monkeypatch
+    ):
+        """Test that unchanged files are not re-analyzed on the next run"""
+        import evaluate_quality
+
+        cache_dir = os.path.join(temp_dir, "cache")
+        monkeypatch.setattr(evaluate_quality, "QUALITY_CACHE_DIR", cache_dir)
+
+        # Off unless opted in
+        monkeypatch.delenv("LIBSURGEON_CACHE")
+        analyze_directory(temp_dir, num_workers=1)
+        assert not os.path.exists(cache_dir)
+
+        monkeypatch.setenv("LIBSURGEON_CACHE", "1")
+        first = analyze_directory(temp_dir, num_workers=1)
+        assert len(os.listdir(cache_dir)) == 1
+        # Nothing is written into the analyzed directory
+        assert sorted(os.listdir(temp_dir)) == sorted(
+            ["BadModule.cpp", "TestModule.cpp", "cache"]
+        )
+
+        analyzed = []
+
+        def tracking_analyze_file(filepath):
+            analyzed.append(filepath)
+            return analyze_file(filepath)
+
+        monkeypatch.setattr(evaluate_quality, "analyze_file", tracking_analyze_file)
+        second = analyze_directory(temp_dir, num_workers=1)
+        assert analyzed == []
+        assert second.file_metrics == first.file_metrics
+
+        with open(sample_cpp_file, "a") as f:
+            f.write("\nhalt_baddata();\n")
+        third = analyze_directory(temp_dir, num_workers=1)
+        assert analyzed == [sample_cpp_file]
+        assert third.total_halt_baddata == first.total_halt_baddata + 1
 
     def test_analyze_directory_with_c_files(
         self, sample_cpp_file, sample_c_file, temp_dir
@@ -75,6 +125,27 @@ class TestQualityEvaluation:
         project = analyze_directory(temp_dir, file_pattern="*.c")
         assert project.total_files >= 1
 
+    def test_analyze_directory_subdirectory_pattern(self, sample_cpp_file, temp_dir):
+        """Test patterns with a directory part and patterns for hidden files"""
+        src_dir = os.path.join(temp_dir, "src")
+        os.makedirs(src_dir)
+        with open(os.path.join(src_dir, "Module.cpp"), "w") as f:
+            f.write("void f() { goto end; end: return; }\n")
+        with open(os.path.join(temp_dir, ".hidden.cpp"), "w") as f:
+            f.write("void g() {}\n")
+
+        project = analyze_directory(
+            temp_dir, file_pattern=os.path.join("src", "*.cpp"), num_workers=1
+        )
+        assert [m.filename for m in project.file_metrics] == ["Module.cpp"]
+        assert project.file_metrics[0].goto_statements == 1
+
+        project = analyze_directory(temp_dir, file_pattern="*.cpp", num_workers=1)
+        assert ".hidden.cpp" not in [m.filename for m in project.file_metrics]
+
+        project = analyze_directory(temp_dir, file_pattern=".*.cpp", num_workers=1)
+        assert [m.filename for m in project.file_metrics] == [".hidden.cpp"]
+
     def test_quality_score_calculation(self):
         """Test quality score calculation"""
         metrics = FileMetrics(filepath="test.cpp", filename="test.cpp")
@@ -100,6 +171,51 @@ void test() {
         assert len(PATTERNS["undefined_type"].findall(test_code)) == 2
         assert len(PATTERNS["goto"].findall(test_code)) == 1
 
+    def test_combined_counts_match_individual_patterns(self, temp_dir):
+        """Test that the single-pass counters agree with each pattern alone"""
+        content = """
+void Foo::bar(int param_1)
+{
+    *(undefined4 *)(param_1 + 0x10) = 0;
+    (*(code *)(param_1 + 0x1c))();
+    __asm("nop");
+    halt_baddata();
+    __stack_chk_fail();
+    Baz::qux(1);
+    goto LAB_001;
+}
+"""
+        filepath = os.path.join(temp_dir, "counts.cpp")
+        with open(filepath, "w") as f:
+            f.write(content)
+
+        metrics = analyze_file(filepath)
+
+        def count(name):
+            return len(PATTERNS[name].findall(content))
+
+        assert metrics.halt_baddata == count("halt_baddata") == 1
+        # undefined4 inside the cast still counts
+        assert metrics.undefined_types == count("undefined_type") == 1
+        assert metrics.excessive_casts == count("excessive_cast") == 2
+        assert metrics.raw_pointers == count("raw_pointer_arithmetic") == 2
+        assert metrics.goto_statements == count("goto") == 1
+        assert metrics.inline_assembly == count("inline_asm") == 1
+        assert metrics.stack_chk_fail == count("stack_chk") == 1
+        assert metrics.demangled_names == count("demangled_name") == 2
+
+    def test_combined_counts_overlapping_matches(self, temp_dir):
+        """Test a demangled call whose "(" also opens an excessive cast"""
+        content = "x = A::f(int *)(p);\n"
+        filepath = os.path.join(temp_dir, "overlap.cpp")
+        with open(filepath, "w") as f:
+            f.write(content)
+
+        metrics = analyze_file(filepath)
+
+        assert metrics.excessive_casts == 1
+        assert metrics.demangled_names == 1
+
 
 class TestIntegration:
     """Integration tests"""
@@ -166,3 +282,13 @@ class TestEdgeCases:
 
         metrics = analyze_file(unicode_file)
         assert metrics.lines > 0
+
+    def test_unicode_pattern_semantics(self, temp_dir):
+        """Test that patterns match non-ASCII text with Unicode semantics"""
+        unicode_file = os.path.join(temp_dir, "unicode_names.cpp")
+        with open(unicode_file, "w", encoding="utf-8") as f:
+            f.write("namespace café {\n  goto\u00a0end;\n  goto…x;\n}\n")
+
+        metrics = analyze_file(unicode_file)
+        assert metrics.namespaces_found == ["café"]
+        assert metrics.goto_statements == 1